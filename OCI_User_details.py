@@ -4,6 +4,8 @@ import os
 import json
 from datetime import datetime
 from helpers.ocisdk import OCISDK
+from helpers.pagination import iterRecords
+from helpers.responsecache import CACHE_ENABLED
 from helpers.utils import getProfilesFromConfig
 import csv
 
@@ -14,9 +16,6 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return json.JSONEncoder.default(self, obj)
 
-# Initialize OCISDK
-ocisdk = OCISDK()
-
 # ==============================================
 # =============== Select Profile ===============
 # ==============================================
@@ -51,23 +50,15 @@ if len(profiles) > 1:
 
 print(f"Selected Profile: {SELECTED_PROFILE}")
 
-# Load the config file and initialize the IdentityClient
-config = oci.config.from_file(OCI_CONFIG_FILE_PATH, SELECTED_PROFILE)
-identity_client = oci.identity.IdentityClient(config)
+# Initialize OCISDK against the selected config file (responses cached across
+# runs when OCISDK_CACHE is set) and take its IdentityClient
+ocisdk = OCISDK(OCI_CONFIG_FILE_PATH, cache=CACHE_ENABLED)
+identity_client = ocisdk.clients.get(SELECTED_PROFILE, "identity")
 
 # Function to list all users in the tenancy
 def list_users(tenancy_ocid):
     try:
-        users = []
-        response = identity_client.list_users(compartment_id=tenancy_ocid)
-        users.extend(response.data)
-        
-        # Handle pagination if necessary
-        while response.has_next_page:
-            response = identity_client.list_users(compartment_id=tenancy_ocid, page=response.next_page)
-            users.extend(response.data)
-        
-        return users
+        return list(iterRecords(identity_client.list_users, compartment_id=tenancy_ocid))
 
     except oci.exceptions.ServiceError as e:
         print(f"Service error: {e}")
@@ -1,11 +1,14 @@
 import oci
 import sys
 import os
-import csv
 import json  
 from datetime import datetime
+from helpers.capacity import CapacityError, capacityTotals
 from helpers.ocisdk import OCISDK
+from helpers.pagination import iterRecords
+from helpers.reports import openReport
 from helpers.utils import getProfilesFromConfig
+from helpers.volumes import BLOCK_VOLUME_SCHEMA, blockVolumeRow
 
 # Custom JSON encoder for datetime objects
 class DateTimeEncoder(json.JSONEncoder):
@@ -14,14 +17,14 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return json.JSONEncoder.default(self, obj)
 
-# Initialize OCISDK
-ocisdk = OCISDK()
-
 # ==============================================
 # =============== Select Profile ===============
 # ==============================================
 SELECTED_PROFILE = ""
 
+# Set to True to also write the block volumes to Reports/block_volume_details2.csv
+WRITE_REPORT = False
+
 # Set your root compartment ID (this should be the tenancy OCID)
 TENANCY_OCID = 'ocid1.compartment.oc1..aaaaaaaak43yymo6paopwm2chr34pzn6csll67ohhclrgeb6bwe5s5vojoba'
 
@@ -51,54 +54,38 @@ if len(profiles) > 1:
 
 print(f"Selected Profile: {SELECTED_PROFILE}")
 
-# Load the config file and initialize the BlockstorageClient and ComputeClient
-config = oci.config.from_file(OCI_CONFIG_FILE_PATH, SELECTED_PROFILE)
-blockstorage_client = oci.core.BlockstorageClient(config)
-compute_client = oci.core.ComputeClient(config)
+# Initialize OCISDK against the selected config file and take its shared
+# BlockstorageClient for the selected profile
+ocisdk = OCISDK(OCI_CONFIG_FILE_PATH)
+blockstorage_client = ocisdk.clients.get(SELECTED_PROFILE, "blockstorage")
 
 compartment_id = 'ocid1.compartment.oc1..aaaaaaaaqebxly4yqahee72qluopghprzfeqy6mazf5fcl6ghruerlcodjua'
 
-# Function to list all block volumes in a compartment
-def list_block_volumes(compartment_id):
-    try:
-        volumes = []
-        response = blockstorage_client.list_volumes(compartment_id=compartment_id)
-        volumes.extend(response.data)
-        
-        # Handle pagination if necessary
-        while response.has_next_page:
-            response = blockstorage_client.list_volumes(compartment_id=compartment_id, page=response.next_page)
-            volumes.extend(response.data)
-        
-        return volumes
+# Function to count all block volumes in a compartment as the pages arrive,
+# writing each to the report if one is given; returns the number of volumes
+# and their total size
+def write_block_volumes(compartment_id, report=None):
+    total_count = 0
+    total_size_gb = 0
 
-    except oci.exceptions.ServiceError as e:
-        print(f"Service error: {e}")
-        return []
-    except Exception as e:
-        print(f"Error: {e}")
-        return []
+    for volume in iterRecords(blockstorage_client.list_volumes, compartment_id=compartment_id):
+        if report is not None:
+            report.write(blockVolumeRow(volume))
+        total_count += 1
+        total_size_gb += volume.size_in_gbs
+
+    return total_count, total_size_gb
 
-# Function to list all instances in a compartment and sum their OCPUs and memory
+# Function to sum the OCPUs and memory of all instances in a compartment
+# (shape_config is already part of the list_instances response)
 def get_total_resources(compartment_id):
     try:
-        total_ocpus = 0
-        total_memory_gb = 0
-        response = compute_client.list_instances(compartment_id=compartment_id)
-        instances = response.data
-        
-        # Handle pagination if necessary
-        while response.has_next_page:
-            response = compute_client.list_instances(compartment_id=compartment_id, page=response.next_page)
-            instances.extend(response.data)
-        
-        for instance in instances:
-            shape_details = compute_client.get_instance(instance.id).data.shape_config
-            total_ocpus += shape_details.ocpus
-            total_memory_gb += shape_details.memory_in_gbs  # Assuming `memory_in_gbs` is available
-
-        return total_ocpus, total_memory_gb
+        capacity = ocisdk.getCapacity([compartment_id], cfgName=SELECTED_PROFILE)
+        return capacityTotals(capacity)
 
+    except CapacityError as e:
+        print(f"Warning: totals are incomplete. {e}")
+        return capacityTotals(e.capacity)
     except oci.exceptions.ServiceError as e:
         print(f"Service error: {e}")
         return 0, 0
@@ -106,20 +93,23 @@ def get_total_resources(compartment_id):
         print(f"Error: {e}")
         return 0, 0
 
-# Get all block volumes in the specified compartment
-block_volumes = list_block_volumes(compartment_id)
-
-print(f"Total number of block volumes: {len(block_volumes)}")
-
-# Initialize a variable to hold the sum of sizes
-total_size_gb = 0
-
-
+# Stream the block volumes of the specified compartment, into Reports/ when
+# WRITE_REPORT is set; on an error the report is abandoned and any previous one kept
+total_count = total_size_gb = 0
+try:
+    if WRITE_REPORT:
+        with openReport(BLOCK_VOLUME_SCHEMA, name='block_volume_details2') as report:
+            total_count, total_size_gb = write_block_volumes(compartment_id, report)
+        print(f"Block Volume Details have been written to {report.path}")
+    else:
+        total_count, total_size_gb = write_block_volumes(compartment_id)
+
+except oci.exceptions.ServiceError as e:
+    print(f"Service error: {e}")
+except Exception as e:
+    print(f"Error: {e}")
 
-print("Display_Name,volume_OCID,Size (in GB),Lifecycle State")
-for volume in block_volumes:
-#    print(f"Display Name: {volume.display_name}, Volume_OCID: {volume.id}, Size (in GB): {volume.size_in_gbs}, Lifecycle State: {volume.lifecycle_state}")
-    total_size_gb += volume.size_in_gbs
+print(f"Total number of block volumes: {total_count}")
 
 '''
 
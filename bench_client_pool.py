@@ -0,0 +1,58 @@
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import oci
+
+from helpers.clients import ClientRegistry
+from helpers.mockserver import MockOCIServer, makeTestConfig
+
+# ==============================================
+# Calls/second of get_user against a local mock identity endpoint, building a
+# new client per call (old OCISDK behaviour) vs the shared ClientRegistry.
+# ==============================================
+
+
+def get_user(match, query, body):
+    return 200, {}, {"id": match.group(1), "name": "bench-user",
+                     "lifecycleState": "ACTIVE"}
+
+
+def run(label, call, calls, workers, server):
+    server.connectionCount = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22}{calls / elapsed:>12.1f}{server.connectionCount:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, MockOCIServer() as server:
+        server.route("GET", r"/20160918/users/([^/]+)", get_user)
+        cfg = makeTestConfig(tmp)
+
+        def per_call(i):
+            client = oci.identity.IdentityClient(cfg, service_endpoint=server.url)
+            return client.get_user(f"ocid1.user.oc1..u{i}").data
+
+        registry = ClientRegistry({"bench": cfg}, poolSize=args.workers,
+                                  serviceEndpoints={"identity": server.url})
+
+        def pooled(i):
+            client = registry.get("bench", "identity")
+            return client.get_user(f"ocid1.user.oc1..u{i}").data
+
+        print(f"{'mode':<22}{'calls/s':>12}{'connections':>14}")
+        run("client per call", per_call, args.calls, args.workers, server)
+        run("ClientRegistry", pooled, args.calls, args.workers, server)
+
+
+if __name__ == "__main__":
+    main()
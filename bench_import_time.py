@@ -0,0 +1,65 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# ==============================================
+# Cold-start cost of the helpers package, measured with `python -X importtime`.
+# Exits non-zero when the median exceeds --max-ms or when a heavy dependency
+# is pulled in at import time.
+# ==============================================
+
+IMPORT_STMT = "import helpers.ocisdk, helpers.utils"
+FORBIDDEN = ("oci", "pandas", "numpy", "paramiko")
+
+
+def measure():
+    # -X importtime writes "import time: self [us] | cumulative | package" to stderr
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_STMT],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        selfUs, cumulativeUs, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(selfUs), int(cumulativeUs)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=100.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        rows = measure()
+        totals.append(sum(selfUs for _, selfUs, _ in rows) / 1000.0)
+
+    median = statistics.median(totals)
+    loaded = {name.strip() for name, _, _ in rows}
+    heavy = sorted(m for m in loaded if m.split(".")[0] in FORBIDDEN)
+
+    print(f"'{IMPORT_STMT}' over {args.runs} runs: median {median:.1f} ms "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), limit {args.max_ms:.1f} ms")
+    print(f"\n{'cumulative ms':>14}  module")
+    for name, _, cumulativeUs in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{cumulativeUs / 1000.0:>14.2f}  {name}")
+
+    failed = False
+    if heavy:
+        print(f"\nFAIL: imported at load time: {', '.join(heavy)}")
+        failed = True
+    if median > args.max_ms:
+        print(f"\nFAIL: cold start {median:.1f} ms exceeds {args.max_ms:.1f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import tempfile
+import time
+from urllib.parse import parse_qs
+
+from bench_tag_search import instance_json
+from helpers.instrumentation import CallMetrics
+from helpers.mockserver import MockOCIServer, makeTestConfigFile
+from helpers.ocisdk import OCISDK
+
+# ==============================================
+# getAllVMs over a paginated mock Compute endpoint, with and without per-call
+# instrumentation, to show its overhead; prints the collected summary table
+# and the start of the Prometheus export.
+# ==============================================
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instances", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    def list_instances(match, query, body):
+        start = int(parse_qs(query).get("page", ["0"])[0])
+        end = min(start + args.page_size, args.instances)
+        headers = {"opc-next-page": str(end)} if end < args.instances else {}
+        return 200, headers, [instance_json(i, False) for i in range(start, end)]
+
+    with tempfile.TemporaryDirectory() as tmp, MockOCIServer() as server:
+        server.route("GET", r"/20160918/instances", list_instances)
+        configFile = makeTestConfigFile(tmp)
+        metrics = CallMetrics()
+
+        timings = {}
+        for label, value in (("metrics=False", False), ("CallMetrics", metrics)):
+            sdk = OCISDK(configFile=configFile, serviceEndpoints={"compute": server.url},
+                         metrics=value)
+            sdk.getAllVMs("ocid1.compartment.oc1..dev")  # warm the connection
+
+            best = float("inf")
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                vms = sdk.getAllVMs("ocid1.compartment.oc1..dev")
+                best = min(best, time.perf_counter() - start)
+            timings[label] = best
+            assert len(vms) == args.instances
+
+    pages = -(-args.instances // args.page_size)
+    print(f"{args.instances} instances, {pages} pages, best of {args.runs}")
+    for label, seconds in timings.items():
+        print(f"  {label:<15}{seconds * 1000:>9.1f} ms")
+    print(f"  overhead       {(timings['CallMetrics'] / timings['metrics=False'] - 1) * 100:>8.1f} %")
+    print()
+    print(metrics.summaryTable())
+    print()
+    print("\n".join(metrics.toPrometheus().splitlines()[:6]))
+
+    stats = metrics.toJSON()["compute.list_instances"]
+    assert stats["pages"] == stats["calls"] == pages * (args.runs + 1)
+    assert stats["bytes"] > 0
+
+
+if __name__ == "__main__":
+    main()
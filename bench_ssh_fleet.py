@@ -0,0 +1,76 @@
+import argparse
+import os
+import tempfile
+import time
+
+import paramiko
+
+from helpers.mockserver import MockSSHServer
+from helpers.sshfleet import SSHFleet
+
+# ==============================================
+# Runs a few commands on N local mock SSH hosts, the old way (decrypt the key,
+# connect and run per host per command, one host at a time) vs SSHFleet.
+# ==============================================
+
+PASSPHRASE = "bench-passphrase"
+
+
+def sequential(hosts, keyFile, commands):
+    for host in hosts:
+        hostname, port = host.split(":")
+        for command in commands:
+            key = paramiko.RSAKey(filename=keyFile, password=PASSPHRASE)
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh.connect(hostname, port=int(port), username="opc", pkey=key,
+                        allow_agent=False, look_for_keys=False)
+            stdin, stdout, stderr = ssh.exec_command(command)
+            stdout.read()
+            stderr.read()
+            ssh.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--parallelism", type=int, default=16)
+    args = parser.parse_args()
+
+    commands = ["echo one", "sleep 0.2; echo two", "uname -s"]
+    key = paramiko.RSAKey.generate(2048)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        keyFile = os.path.join(tmp, "fleet_key")
+        key.write_private_key_file(keyFile, password=PASSPHRASE)
+
+        servers = [MockSSHServer(key).start() for _ in range(args.hosts)]
+        hosts = [server.address for server in servers]
+
+        try:
+            start = time.perf_counter()
+            sequential(hosts, keyFile, commands)
+            old = time.perf_counter() - start
+            oldConnections = sum(server.connectionCount for server in servers)
+
+            start = time.perf_counter()
+            with SSHFleet("opc", keyFile=keyFile, passphrase=PASSPHRASE,
+                          parallelism=args.parallelism,
+                          onLine=lambda host, stream, line: None) as fleet:
+                results = list(fleet.run(hosts, commands))
+            new = time.perf_counter() - start
+            newConnections = sum(server.connectionCount for server in servers) - oldConnections
+        finally:
+            for server in servers:
+                server.stop()
+
+    print(f"{'':<14}{'seconds':>10}{'connections':>14}")
+    print(f"{'sequential':<14}{old:>10.2f}{oldConnections:>14}")
+    print(f"{'SSHFleet':<14}{new:>10.2f}{newConnections:>14}")
+
+    assert all(r.exit_code == 0 for r in results)
+    assert newConnections == args.hosts
+
+
+if __name__ == "__main__":
+    main()
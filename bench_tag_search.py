@@ -0,0 +1,73 @@
+import argparse
+import json
+import tempfile
+import time
+
+from helpers.mockserver import MockOCIServer, makeTestConfigFile
+from helpers.ocisdk import OCISDK
+
+# ==============================================
+# getAllVMsByTag against a local mock Resource Search + Compute endpoint:
+# N instances in the tenancy, M of them tagged. Reports requests made.
+# ==============================================
+
+
+def instance_json(i, tagged):
+    return {
+        "id": f"ocid1.instance.oc1..vm{i}",
+        "displayName": f"vm{i}",
+        "compartmentId": "ocid1.compartment.oc1..dev",
+        "lifecycleState": "RUNNING",
+        "region": "us-ashburn-1",
+        "shape": "VM.Standard.E4.Flex",
+        "shapeConfig": {"ocpus": 2.0, "memoryInGBs": 16.0},
+        "freeformTags": {"Schedule": "nightly"} if tagged else {},
+        "definedTags": {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instances", type=int, default=10000)
+    parser.add_argument("--tagged", type=int, default=20)
+    args = parser.parse_args()
+
+    tagged = set(range(0, args.instances, max(args.instances // args.tagged, 1)))
+    queries = []
+
+    def search(match, query, body):
+        queries.append(json.loads(body)["query"])
+        items = [{"identifier": f"ocid1.instance.oc1..vm{i}",
+                  "resourceType": "Instance",
+                  "compartmentId": "ocid1.compartment.oc1..dev"}
+                 for i in sorted(tagged)]
+        return 200, {}, {"items": items}
+
+    def get_instance(match, query, body):
+        i = int(match.group(1))
+        return 200, {}, instance_json(i, i in tagged)
+
+    with tempfile.TemporaryDirectory() as tmp, MockOCIServer() as server:
+        server.route("POST", r"/20180409/resources", search)
+        server.route("GET", r"/20160918/instances/ocid1\.instance\.oc1\.\.vm(\d+)",
+                     get_instance)
+
+        sdk = OCISDK(configFile=makeTestConfigFile(tmp),
+                     serviceEndpoints={"search": server.url,
+                                       "compute": server.url})
+
+        start = time.perf_counter()
+        vms = sdk.getAllVMsByTag(None, "Schedule", "nightly")
+        elapsed = time.perf_counter() - start
+
+    print(f"query     : {queries[0]}")
+    print(f"matched   : {len(vms)} of {args.instances} instances")
+    print(f"requests  : {server.requestCount} ({len(queries)} search)")
+    print(f"elapsed   : {elapsed * 1000:.1f} ms")
+
+    assert len(vms) == len(tagged)
+    assert server.requestCount == len(tagged) + len(queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import tempfile
+import threading
+import time
+
+from helpers.concurrency import fanOut
+from helpers.mockserver import MockOCIServer, makeTestConfigFile
+from helpers.ocisdk import OCISDK
+from helpers.throttle import ThrottleController
+
+# ==============================================
+# get_user in bulk against a local mock identity endpoint that only admits
+# --rate requests/second (token bucket) and answers 429 beyond that. Compares
+# the SDK's own retry strategy with the shared ThrottleController.
+# ==============================================
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+def run(label, sdk, calls, workers, server, bucket):
+    server.requestCount = 0
+    throttled = [0]
+    bucket.tokens = bucket.burst
+
+    def get_user(match, query, body):
+        if not bucket.take():
+            throttled[0] += 1
+            headers = {"retry-after": server.retryAfter} if server.retryAfter else {}
+            return 429, headers, {"code": "TooManyRequests", "message": "slow down"}
+        return 200, {}, {"id": match.group(1), "name": "bench-user",
+                         "lifecycleState": "ACTIVE"}
+
+    server.routes = [("GET", *server.routes[0][1:2], get_user)]
+
+    identity = sdk.clients.get("DEFAULT", "identity")
+    start = time.perf_counter()
+    results = list(fanOut(lambda i: identity.get_user(f"ocid1.user.oc1..u{i}"),
+                          range(calls), workers))
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for r in results if r.error is not None)
+
+    print(f"{label:<22}{(calls - failed) / elapsed:>10.1f}{server.requestCount:>10}"
+          f"{throttled[0]:>8}{failed:>8}{elapsed:>9.2f}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--rate", type=float, default=300, help="admitted requests/s")
+    parser.add_argument("--retry-after", type=int, default=0, help="seconds sent with 429s")
+    args = parser.parse_args()
+
+    bucket = TokenBucket(args.rate, burst=max(args.rate / 10, 1))
+
+    with tempfile.TemporaryDirectory() as tmp, MockOCIServer() as server:
+        server.retryAfter = args.retry_after
+        server.route("GET", r"/20160918/users/([^/]+)", None)
+        configFile = makeTestConfigFile(tmp)
+        endpoints = {"identity": server.url}
+
+        print(f"{'':<22}{'ok/s':>10}{'requests':>10}{'429s':>8}{'failed':>8}{'seconds':>9}")
+        run("SDK retry strategy", OCISDK(configFile, endpoints, throttle=False),
+            args.calls, args.workers, server, bucket)
+
+        controller = ThrottleController()
+        failed = run("ThrottleController", OCISDK(configFile, endpoints, throttle=controller),
+                     args.calls, args.workers, server, bucket)
+        print(f"controller: {controller.stats()}")
+
+    assert failed == 0
+
+
+if __name__ == "__main__":
+    main()
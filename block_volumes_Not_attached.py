@@ -1,13 +1,11 @@
-import oci
 import sys
 import os
 
 
 from helpers.ocisdk import OCISDK
+from helpers.reports import openReport
 from helpers.utils import getProfilesFromConfig
-
-
-ocisdk = OCISDK()
+from helpers.volumes import UNATTACHED_SCHEMA, unattachedRow
 
 
 # ==============================================
@@ -16,9 +14,6 @@ ocisdk = OCISDK()
 SELECTED_PROFILE = ""
 
 
-COMPARTMENT_ID = 'ocid1.compartment.oc1..aaaaaaaak43yymo6paopwm2chr34pzn6csll67ohhclrgeb6bwe5s5vojoba'
-
-
 try:
     # load OCI Configs
     OCI_CONFIG_FILE_PATH =  os.getcwd() + "/configs/config.oci"  # '~/.oci/config'
@@ -45,21 +40,24 @@ if len(profiles) > 1:
 print(f"Selected Profile X : {SELECTED_PROFILE}")
 
 
-COMPARTMENT_ID = 'ocid1.compartment.oc1..aaaaaaaak43yymo6paopwm2chr34pzn6csll67ohhclrgeb6bwe5s5vojoba'
+ocisdk = OCISDK(OCI_CONFIG_FILE_PATH)
 
+total_count = 0
+total_size_gb = 0
 
-
-def get_instance_display_names(ocisdk, compartment_id, cfg_name):
-    try:
-        instances = ocisdk.getAllVMs(compartment_id, cfgName=cfg_name)
-        display_names = [instance.display_name for instance in instances]
-        return display_names
-    except Exception as e:
-        print(f"Error retrieving instance display names: {e}")
-        return []
-    
-
-    instance_display_names = get_instance_display_names(ocisdk, COMPARTMENT_ID, selected_profile)
-    print("Instance Display Names:")
-    for display_name in instance_display_names:
-        print(display_name)
\ No newline at end of file
+# Every block and boot volume in the tenancy that no instance has attached
+try:
+    with openReport(UNATTACHED_SCHEMA) as report:
+        for volume in ocisdk.streamUnattachedVolumes(cfgName=SELECTED_PROFILE):
+            report.write(unattachedRow(volume))
+            print(f"Name: {volume['name']}, OCID: {volume['id']}, Type: {volume['kind']}, "
+                  f"Size: {volume['size_gb']} GB, Age: {volume['age_days']} days")
+
+            total_count += 1
+            total_size_gb += volume['size_gb'] or 0
+except RuntimeError as e:
+    print(f"Error: {e}")
+    sys.exit(1)
+
+print(f"\nUnattached volumes: {total_count}, total size: {total_size_gb} GB")
+print(f"Unattached volume details have been written to {report.path}")
@@ -1,43 +1,37 @@
-import oci
-import csv
+import os
+
+from helpers.ocisdk import OCISDK
+from helpers.pagination import iterRecords
+from helpers.reports import ReportSchema, openReport
+from helpers.responsecache import CACHE_ENABLED
 
 # Specify the path to your OCI config file and the profile name
 config_file_path = '~/.oci/config'  # e.g., '~/.oci/config'
 config_profile_name = 'irfath_codegen'  # e.g., 'DEFAULT'
 
-# Load the OCI config
-config = oci.config.from_file(config_file_path, config_profile_name)
+# Load the OCI config (responses cached across runs when OCISDK_CACHE is set)
+ocisdk = OCISDK(os.path.expanduser(config_file_path), cache=CACHE_ENABLED)
 
 # Initialize the IdentityClient
-identity_client = oci.identity.IdentityClient(config)
+identity_client = ocisdk.clients.get(config_profile_name, "identity")
 
 # Specify the OCID of the root compartment (typically your tenancy OCID)
-root_compartment_id = config["tenancy"]
+root_compartment_id = ocisdk.configs[config_profile_name]["tenancy"]
 
-# List all compartments in the specified root compartment
-compartments = oci.pagination.list_call_get_all_results(
-    identity_client.list_compartments,
-    root_compartment_id,
-    compartment_id_in_subtree=True
-).data
+COMPARTMENT_SCHEMA = ReportSchema("compartment_names", [
+    ("Compartment Name", "string"),
+    ("Compartment OCID", "string"),
+])
 
-# Print the names of all compartments
+# List all compartments in the specified root compartment, printing each one
+# and writing it to Reports/ as the pages arrive
 print("Compartment Names and OCIDs:")
-for compartment in compartments:
-    print(f"Name: {compartment.name}, OCID: {compartment.id}")
-
-
-# Prepare data for CSV
-compartment_data = [["Compartment Name", "Compartment OCID"]]  # Header row
-for compartment in compartments:
-    compartment_data.append([compartment.name, compartment.id])
-
-# Specify the path to the CSV file
-csv_file_path = r'C:\Users\irfath\Desktop\CodeGen Knowledge\Python\OCI_test\Reports\compartment_names.csv'
 
-# Write the compartment names and OCIDs to the CSV file
-with open(csv_file_path, mode='w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerows(compartment_data)
+with openReport(COMPARTMENT_SCHEMA) as report:
+    for compartment in iterRecords(identity_client.list_compartments,
+                                   root_compartment_id,
+                                   compartment_id_in_subtree=True):
+        print(f"Name: {compartment.name}, OCID: {compartment.id}")
+        report.write([compartment.name, compartment.id])
 
-print(f"Compartment names and OCIDs have been written to {csv_file_path}")
\ No newline at end of file
+print(f"Compartment names and OCIDs have been written to {report.path}")
@@ -1,10 +1,12 @@
+import argparse
 import sys
 import os
 import json
 from datetime import datetime
+from helpers.clients import DEFAULT_POOL_SIZE
 from helpers.ocisdk import OCISDK
+from helpers.reports import REPORTS_DIR, ReportSchema, ReportWriter
 from helpers.utils import getProfilesFromConfig
-import oci
 
 # Custom JSON encoder for datetime objects
 class DateTimeEncoder(json.JSONEncoder):
@@ -13,69 +15,118 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return json.JSONEncoder.default(self, obj)
 
-# Initialize OCISDK
-ocisdk = OCISDK()
-
 # ==============================================
 # =============== Select Profile ===============
 # ==============================================
-SELECTED_PROFILE = ""
 
 # Set your root compartment ID (this should be the tenancy OCID)
 TENANCY_OCID = 'ocid1.tenancy.oc1..aaaaaaaaxckvxcrpggjrgzbzg4rt2c436k5qdo3w3nnqqk6xyhuzikd4rubq'
 
-try:
-    # Load OCI Configs
-    OCI_CONFIG_FILE_PATH = os.path.expanduser("~/.oci/config")
-    profiles = getProfilesFromConfig(OCI_CONFIG_FILE_PATH)
-    SELECTED_PROFILE = profiles[0]
-
-except Exception as e:
-    print(f"Error: Cannot read config file or empty config file. Details: {e}")
-    sys.exit()
-
-# If multiple profiles are found, prompt the user to select one
-if len(profiles) > 1:
-    print("Please select config name : \n")
+# Load OCI Configs
+OCI_CONFIG_FILE_PATH = os.path.expanduser("~/.oci/config")
 
-    for i, prof in enumerate(profiles):
-        print(f"\t{i+1} : {prof}")
 
+def select_profile(args):
     try:
-        ind = int(input("\nEnter the profile number : "))
-        SELECTED_PROFILE = profiles[ind - 1]
+        profiles = getProfilesFromConfig(OCI_CONFIG_FILE_PATH)
+        selected_profile = profiles[0]
     except Exception as e:
-        print(f"Error: Invalid input. Details: {e}")
+        print(f"Error: Cannot read config file or empty config file. Details: {e}")
         sys.exit()
 
-print(f"Selected Profile: {SELECTED_PROFILE}")
+    if args.profile:
+        if args.profile not in profiles:
+            print(f"Error: No profile {args.profile} in {OCI_CONFIG_FILE_PATH}")
+            sys.exit(1)
+        selected_profile = args.profile
+
+    # If multiple profiles are found, prompt the user to select one
+    elif len(profiles) > 1:
+        # stdin carries the volume ids, it can't answer the prompt too
+        if args.file == '-':
+            print("Error: Several profiles found; pass --profile when reading ids from stdin")
+            sys.exit(1)
+
+        print("Please select config name : \n")
+
+        for i, prof in enumerate(profiles):
+            print(f"\t{i+1} : {prof}")
 
-# Load the config file and initialize the BlockstorageClient and IdentityClient
-config = oci.config.from_file(OCI_CONFIG_FILE_PATH, SELECTED_PROFILE)
-blockstorage_client = oci.core.BlockstorageClient(config)
-identity_client = oci.identity.IdentityClient(config)
-compute_client = oci.core.ComputeClient(config)
+        try:
+            ind = int(input("\nEnter the profile number : "))
+            selected_profile = profiles[ind - 1]
+        except Exception as e:
+            print(f"Error: Invalid input. Details: {e}")
+            sys.exit()
+
+    print(f"Selected Profile: {selected_profile}")
+    return selected_profile
 
 # ==============================================
-# =========== Delete Block Volume ==============
+# =========== Delete Block Volumes =============
 # ==============================================
 
-def delete_block_volume(volume_id):
-    try:
-        # Get the block volume
-        volume = blockstorage_client.get_volume(volume_id).data
-        print(f"Found Block Volume: {volume.display_name}")
+RESULT_SCHEMA = ReportSchema("volume_deletions", [
+    ("Volume_OCID", "string"),
+    ("Display Name", "string"),
+    ("Size (in GB)", "int"),
+    ("Action", "string"),
+    ("Final State", "string"),
+    ("Error", "string"),
+])
 
-        # Delete the block volume
-        blockstorage_client.delete_volume(volume_id)
-        print(f"Block Volume '{volume.display_name}' is being deleted.")
-    except oci.exceptions.ServiceError as e:
-        print(f"Error: {e.message}")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python delete_block_volume.py <volume_id>")
+def read_volume_ids(args):
+    volume_ids = list(args.volume_ids)
+
+    if args.file:
+        source = sys.stdin if args.file == '-' else open(args.file)
+        with source:
+            volume_ids.extend(line.strip() for line in source
+                              if line.strip() and not line.startswith('#'))
+
+    return volume_ids
+
+
+def delete_block_volumes(args):
+    selected_profile = select_profile(args)
+
+    # Initialize OCISDK against the selected config file
+    ocisdk = OCISDK(OCI_CONFIG_FILE_PATH)
+
+    volume_ids = read_volume_ids(args)
+    if not volume_ids:
+        print("No volume ids given.")
         sys.exit(1)
 
-    volume_id = sys.argv[1]
-    delete_block_volume(volume_id)
+    print(f"{'Checking' if args.dry_run else 'Deleting'} {len(volume_ids)} block volume(s)...")
+
+    outcomes = ocisdk.deleteVolumes(volume_ids,
+                                    dryRun=args.dry_run,
+                                    wait=not args.no_wait,
+                                    cfgName=selected_profile,
+                                    workers=args.workers)
+
+    with ReportWriter(args.output, RESULT_SCHEMA) as report:
+        for outcome in outcomes:
+            report.write([outcome["id"], outcome["name"], outcome["size_gb"],
+                          outcome["action"], outcome["state"], outcome["error"]])
+            print(f"{outcome['id']} ({outcome['name']}): {outcome['state']}"
+                  + (f" - {outcome['error']}" if outcome['error'] else ""))
+
+    print(f"Results have been written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete block volumes in bulk")
+    parser.add_argument("volume_ids", nargs="*", help="volume OCIDs")
+    parser.add_argument("--file", help="file with one volume OCID per line, '-' for stdin")
+    parser.add_argument("--profile", help="config profile (prompted for when there are several)")
+    parser.add_argument("--dry-run", action="store_true", help="only look the volumes up")
+    parser.add_argument("--no-wait", action="store_true", help="don't wait for TERMINATED")
+    parser.add_argument("--workers", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--output", default=os.path.join(
+        REPORTS_DIR, f"volume_deletions-{datetime.now():%Y%m%d-%H%M%S}.csv"),
+        help="report path; .csv, .csv.gz, .jsonl or .parquet")
+
+    delete_block_volumes(parser.parse_args())
@@ -0,0 +1,152 @@
+#########################################################################################
+# Filename    : addresses.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Bulk instance -> IP resolution through VNIC attachments, with a TTL cache
+#########################################################################################
+
+import json
+import logging
+import os
+import threading
+import time
+
+from .clients import DEFAULT_POOL_SIZE
+from .concurrency import fanOut
+from .pagination import iterRecords
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ocisdk",
+                                          "instance_ips.json")
+
+# private IPs only change when a VNIC is replaced; an hour keeps reruns free
+DEFAULT_ADDRESS_TTL = 3600
+
+
+# top-level key of the JSON file holding whole selections rather than a tenancy
+SELECTIONS_KEY = "selections"
+
+
+class AddressCache:
+    """
+    {tenancy: {instance id: address record}} kept in one JSON file, plus whole
+    instance selections (tag / compartment -> VMs and addresses) under
+    "selections". Records older than `ttl` seconds are ignored and dropped on
+    the next save.
+    """
+
+    def __init__(self, path=DEFAULT_ADDRESS_CACHE_PATH, ttl=DEFAULT_ADDRESS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, tenancy, instanceIDs):
+        """Returns {instance id: record} for the ids with a fresh cached record."""
+
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            cached = self._read().get(tenancy, {})
+
+        return {i: {k: v for k, v in cached[i].items() if k != "fetched_at"}
+                for i in instanceIDs
+                if i in cached and cached[i]["fetched_at"] >= cutoff}
+
+    def save(self, tenancy, records):
+
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            data = self._read()
+            current = {i: r for i, r in data.get(tenancy, {}).items()
+                       if r["fetched_at"] >= cutoff}
+            current.update(records)
+            data[tenancy] = current
+            self._write(data)
+
+    def loadSelection(self, tenancy, selector):
+        """Returns (vms, addresses) of a fresh cached selection, or None."""
+
+        with self._lock:
+            entry = self._read().get(SELECTIONS_KEY, {}).get(tenancy, {}).get(selector)
+
+        if entry is None or entry["fetched_at"] < time.time() - self.ttl:
+            return None
+        return entry["vms"], entry["addresses"]
+
+    def saveSelection(self, tenancy, selector, vms, addresses):
+
+        now = time.time()
+        with self._lock:
+            data = self._read()
+            selections = data.setdefault(SELECTIONS_KEY, {})
+            current = {s: e for s, e in selections.get(tenancy, {}).items()
+                       if e["fetched_at"] >= now - self.ttl}
+            current[selector] = {"fetched_at": now, "vms": vms, "addresses": addresses}
+            selections[tenancy] = current
+            self._write(data)
+
+    def _write(self, data):
+        # write-then-rename so a concurrent reader never sees half a file
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmpPath = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(data, f)
+        os.replace(tmpPath, self.path)
+
+
+def resolveAddresses(clients, cfgName, vms, workers=DEFAULT_POOL_SIZE):
+    """
+    Maps instance id -> {"private_ip", "public_ip", "hostname"} for the VM dicts
+    in `vms` (getAllVMs / getAllVMsByTag output): one paginated VNIC attachment
+    listing per compartment, then the VNICs fetched in parallel. Instances
+    without an attached VNIC are left out.
+    """
+
+    compute_client = clients.get(cfgName, "compute")
+    network_client = clients.get(cfgName, "network")
+
+    wanted = {}
+    for vm in vms:
+        wanted.setdefault(vm["compartment_id"], set()).add(vm["id"])
+
+    def listAttachments(compartmentID):
+        return [(a.instance_id, a.vnic_id) for a in iterRecords(
+            compute_client.list_vnic_attachments, compartment_id=compartmentID)
+            if a.lifecycle_state == "ATTACHED" and a.instance_id in wanted[compartmentID]]
+
+    attachments = []
+    for res in fanOut(listAttachments, list(wanted), workers):
+        if res.error is not None:
+            log.warning("error listing VNIC attachments in %s: %s", res.key, res.error)
+            continue
+        attachments.extend(res.result)
+
+    instanceOf = {vnicId: instanceId for instanceId, vnicId in attachments}
+    addresses = {}
+
+    for res in fanOut(lambda vnicId: network_client.get_vnic(vnicId).data,
+                      list(instanceOf), workers):
+        if res.error is not None:
+            log.warning("error fetching VNIC %s: %s", res.key, res.error)
+            continue
+
+        vnic = res.result
+        instanceId = instanceOf[res.key]
+        # an instance with secondary VNICs is addressed through its primary one
+        if instanceId in addresses and not vnic.is_primary:
+            continue
+
+        addresses[instanceId] = {
+            "private_ip": vnic.private_ip,
+            "public_ip": vnic.public_ip,
+            "hostname": vnic.hostname_label,
+        }
+
+    return addresses
@@ -0,0 +1,45 @@
+#########################################################################################
+# Filename    : capacity.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Vectorized OCPU / memory aggregation over instance list data
+#########################################################################################
+
+CAPACITY_KEYS = ["compartment_id", "shape", "state", "region"]
+
+
+class CapacityError(Exception):
+    """
+    Some compartments could not be listed. `errors` maps each to its error and
+    `capacity` holds the (incomplete) aggregate of the others.
+    """
+
+    def __init__(self, errors, capacity):
+        super().__init__(f"instances of {len(errors)} compartment(s) could not be "
+                         f"listed: {', '.join(map(str, errors))}")
+        self.errors = errors
+        self.capacity = capacity
+
+
+def capacityFrame(vms):
+    import pandas as pd
+
+    # vms are the dicts returned by OCISDK.getAllVMs, shape_config already included
+    frame = pd.DataFrame.from_records(vms, columns=CAPACITY_KEYS + ["ocpu", "memory"])
+    frame[["ocpu", "memory"]] = frame[["ocpu", "memory"]].astype("float64").fillna(0.0)
+    return frame
+
+
+def aggregateCapacity(vms, by=CAPACITY_KEYS):
+
+    frame = capacityFrame(vms)
+
+    return (frame.groupby(list(by), dropna=False, sort=True)
+                 .agg(instances=("ocpu", "size"),
+                      ocpu=("ocpu", "sum"),
+                      memory=("memory", "sum"))
+                 .reset_index())
+
+
+def capacityTotals(capacity):
+    return float(capacity["ocpu"].sum()), float(capacity["memory"].sum())
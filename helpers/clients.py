@@ -0,0 +1,140 @@
+#########################################################################################
+# Filename    : clients.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Thread-safe registry of OCI service clients shared across OCISDK calls
+#########################################################################################
+
+import importlib
+import threading
+
+# service name -> (oci module, client class)
+SERVICES = {
+    "identity": ("oci.identity", "IdentityClient"),
+    "compute": ("oci.core", "ComputeClient"),
+    "blockstorage": ("oci.core", "BlockstorageClient"),
+    "network": ("oci.core", "VirtualNetworkClient"),
+    "usage": ("oci.usage_api", "UsageapiClient"),
+    "budget": ("oci.budget", "BudgetClient"),
+    "containerengine": ("oci.container_engine", "ContainerEngineClient"),
+    "waas": ("oci.waas", "WaasClient"),
+    "search": ("oci.resource_search", "ResourceSearchClient"),
+}
+
+# The default worker count used for concurrent calls. Each client's connection
+# pool holds twice as many (see _sizePool), so threads never wait on (or
+# discard) pooled connections.
+DEFAULT_POOL_SIZE = 16
+
+
+class ClientRegistry:
+    """
+    Lazily builds one client per (profile, service, region) and one signer per
+    profile. With a helpers.responsecache.ResponseCache, get() hands out a
+    caching wrapper unless cached=False (needed when polling for fresh state).
+    With a helpers.throttle.ThrottleController every call goes through it and
+    the SDK's own retries and circuit breaker are switched off. With a
+    helpers.instrumentation.CallMetrics every call is recorded in it.
+    """
+
+    def __init__(self, configs, poolSize=DEFAULT_POOL_SIZE, serviceEndpoints=None,
+                 cache=None, controller=None, metrics=None):
+        self.configs = configs
+        self.poolSize = poolSize
+        self.serviceEndpoints = serviceEndpoints or {}
+        self.cache = cache
+        self.controller = controller
+        self.metrics = metrics
+        self._clients = {}
+        self._signers = {}
+        self._lock = threading.RLock()
+
+    def get(self, cfgName, service, region=None, cached=True):
+        cfg = self.configs[cfgName]
+        key = (cfgName, service, region or cfg.get("region"),
+               cached and self.cache is not None)
+
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._build(cfgName, service, key[2], key[3])
+                    self._clients[key] = client
+        return client
+
+    def getSigner(self, cfgName):
+        signer = self._signers.get(cfgName)
+        if signer is None:
+            with self._lock:
+                signer = self._signers.get(cfgName)
+                if signer is None:
+                    signer = self._buildSigner(self.configs[cfgName])
+                    self._signers[cfgName] = signer
+        return signer
+
+    def clear(self, cfgName=None):
+        with self._lock:
+            for key in [k for k in self._clients if cfgName in (None, k[0])]:
+                del self._clients[key]
+            for name in [n for n in self._signers if cfgName in (None, n)]:
+                del self._signers[name]
+
+    def _buildSigner(self, cfg):
+        from oci.config import get_config_value_or_default
+        from oci.signer import Signer
+
+        return Signer(
+            tenancy=cfg["tenancy"],
+            user=cfg["user"],
+            fingerprint=cfg["fingerprint"],
+            private_key_file_location=cfg.get("key_file"),
+            pass_phrase=get_config_value_or_default(cfg, "pass_phrase"),
+            private_key_content=cfg.get("key_content"))
+
+    def _build(self, cfgName, service, region, cached):
+        if cached:
+            from .responsecache import CachingClient
+
+            return CachingClient(self.get(cfgName, service, region, cached=False),
+                                 self.cache, cfgName, service, region)
+
+        moduleName, className = SERVICES[service]
+        clientClass = getattr(importlib.import_module(moduleName), className)
+
+        cfg = dict(self.configs[cfgName], region=region)
+        kwargs = {"signer": self.getSigner(cfgName)}
+        if service in self.serviceEndpoints:
+            kwargs["service_endpoint"] = self.serviceEndpoints[service]
+
+        if self.controller is not None:
+            from oci.circuit_breaker import NoCircuitBreakerStrategy
+            from oci.retry import NoneRetryStrategy
+
+            # retrying inside the SDK would hide 429s from the controller
+            kwargs["retry_strategy"] = NoneRetryStrategy()
+            kwargs["circuit_breaker_strategy"] = NoCircuitBreakerStrategy()
+
+        client = clientClass(cfg, **kwargs)
+        self._sizePool(client.base_client.session)
+
+        if self.controller is not None:
+            from .throttle import ThrottledClient
+
+            client = ThrottledClient(client, self.controller, service)
+
+        if self.metrics is not None:
+            from .instrumentation import InstrumentedClient
+
+            client = InstrumentedClient(client, self.metrics, service, self.controller)
+        return client
+
+    def _sizePool(self, session):
+        # Reuse the adapter class the SDK session already mounts (the SDK vendors
+        # its own copy of requests) with a pool large enough for our workers.
+        # A worker walking a listing can have its own call and the iterPages
+        # prefetch of the next page in flight at once, hence two per worker.
+        adapterClass = type(session.get_adapter("https://"))
+        for prefix in ("https://", "http://"):
+            session.mount(prefix, adapterClass(pool_connections=self.poolSize,
+                                               pool_maxsize=2 * self.poolSize))
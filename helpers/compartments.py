@@ -0,0 +1,97 @@
+#########################################################################################
+# Filename    : compartments.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Compartment tree with paths, depths and Euler-tour subtree indexes
+#########################################################################################
+
+
+class CompartmentTree:
+    """
+    Built from one compartment listing. Every node gets its parent, depth, full
+    path and Euler-tour entry/exit positions, so ancestor and subtree checks are
+    two integer comparisons and a subtree is a contiguous slice of `order`.
+    """
+
+    def __init__(self, rootId, compartments, rootName="root"):
+        self.rootId = rootId
+        self.nodes = {rootId: {"id": rootId, "name": rootName, "parent": None}}
+        self.children = {rootId: []}
+
+        for cmp in compartments:
+            self.nodes[cmp["id"]] = {"id": cmp["id"], "name": cmp["name"],
+                                     "parent": cmp["parent"]}
+            self.children.setdefault(cmp["id"], [])
+
+        for cmpId, node in self.nodes.items():
+            if cmpId == rootId:
+                continue
+            # a parent we can't see (e.g. deleted) hangs the node off the root
+            if node["parent"] not in self.nodes:
+                node["parent"] = rootId
+            self.children[node["parent"]].append(cmpId)
+
+        self.order = []
+        self._index()
+
+    def _index(self):
+        # iterative DFS: entry = position in `order`, exit = entry + subtree size
+        root = self.nodes[self.rootId]
+        root.update(depth=0, path=root["name"])
+        stack = [(self.rootId, False)]
+
+        while stack:
+            cmpId, leaving = stack.pop()
+            node = self.nodes[cmpId]
+
+            if leaving:
+                node["exit"] = len(self.order)
+                continue
+
+            node["entry"] = len(self.order)
+            self.order.append(cmpId)
+            stack.append((cmpId, True))
+
+            for childId in sorted(self.children[cmpId],
+                                  key=lambda c: self.nodes[c]["name"], reverse=True):
+                child = self.nodes[childId]
+                child.update(depth=node["depth"] + 1,
+                             path=node["path"] + "/" + child["name"])
+                stack.append((childId, False))
+
+    def __contains__(self, cmpId):
+        return cmpId in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def name(self, cmpId):
+        return self.nodes[cmpId]["name"]
+
+    def parent(self, cmpId):
+        return self.nodes[cmpId]["parent"]
+
+    def depth(self, cmpId):
+        return self.nodes[cmpId]["depth"]
+
+    def path(self, cmpId):
+        return self.nodes[cmpId]["path"]
+
+    def isAncestor(self, ancestorId, cmpId):
+        # True for the node itself as well
+        a = self.nodes[ancestorId]
+        n = self.nodes[cmpId]
+        return a["entry"] <= n["entry"] and n["exit"] <= a["exit"]
+
+    def inSubtree(self, cmpId, rootId):
+        return self.isAncestor(rootId, cmpId)
+
+    def subtree(self, cmpId):
+        node = self.nodes[cmpId]
+        return self.order[node["entry"]:node["exit"]]
+
+    def ancestorAtDepth(self, cmpId, depth):
+        node = self.nodes[cmpId]
+        while node["depth"] > depth:
+            node = self.nodes[node["parent"]]
+        return node["id"]
@@ -0,0 +1,62 @@
+#########################################################################################
+# Filename    : concurrency.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Bounded thread-pool helpers for running OCI calls concurrently
+#########################################################################################
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .clients import DEFAULT_POOL_SIZE
+
+# key is the item the call was made for; exactly one of result / error is set
+FanOutResult = namedtuple("FanOutResult", ["key", "result", "error"])
+
+
+def fanOut(func, items, workers=DEFAULT_POOL_SIZE):
+    """
+    Calls func(item) for every item on a bounded pool and yields FanOutResult
+    in completion order. A failing item is reported, never raised.
+    """
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, item): item for item in items}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield FanOutResult(futures[future], future.result(), None)
+                except Exception as e:
+                    yield FanOutResult(futures[future], None, e)
+        finally:
+            # consumer stopped early: don't start the calls still queued
+            for future in futures:
+                future.cancel()
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads: at most `rate` acquisitions per second."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
@@ -0,0 +1,99 @@
+#########################################################################################
+# Filename    : identity.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : In-memory snapshot of users, groups and group memberships
+#########################################################################################
+
+import datetime
+
+from .pagination import iterRecords
+
+
+def userToDict(usr):
+    return {
+        "description": usr.description,
+        "email": usr.email,
+        "email_verified": usr.email_verified,
+        "external_identifier": usr.external_identifier,
+        "id": usr.id,
+        "inactive_status": usr.inactive_status,
+        "is_mfa_activated": usr.is_mfa_activated,
+        "last_successful_login_time": usr.last_successful_login_time,
+        "lifecycle_state": usr.lifecycle_state,
+        "name": usr.name,
+        "previous_successful_login_time": usr.previous_successful_login_time,
+        "time_created": str(usr.time_created),
+    }
+
+
+def groupToDict(grp):
+    return {
+        "defined_tags": grp.defined_tags,
+        "description": grp.description,
+        "freeform_tags": grp.freeform_tags,
+        "id": grp.id,
+        "inactive_status": grp.inactive_status,
+        "lifecycle_state": grp.lifecycle_state,
+        "name": grp.name,
+        "time_created": grp.time_created,
+    }
+
+
+class IdentitySnapshot:
+    """
+    All users, groups and memberships of a tenancy, fetched with a handful of
+    paginated list calls and joined through user->groups / group->users indexes.
+    """
+
+    def __init__(self, identityClient, tenancyId):
+        self.client = identityClient
+        self.tenancyId = tenancyId
+        self.refresh()
+
+    def refresh(self, client=None):
+        # `client` replaces the snapshot's own for this refresh, e.g. to skip a cache
+        client = client or self.client
+        self.users = {usr.id: userToDict(usr) for usr in iterRecords(
+            client.list_users, compartment_id=self.tenancyId)}
+        self.groups = {grp.id: groupToDict(grp) for grp in iterRecords(
+            client.list_groups, compartment_id=self.tenancyId)}
+
+        groupsByUser = {}
+        usersByGroup = {}
+        for membership in self._listMemberships(client):
+            groupsByUser.setdefault(membership.user_id, []).append(membership.group_id)
+            usersByGroup.setdefault(membership.group_id, []).append(membership.user_id)
+
+        self.groupsByUser = groupsByUser
+        self.usersByGroup = usersByGroup
+        self.refreshedAt = datetime.datetime.now()
+
+        return self
+
+    def _listMemberships(self, client):
+        from oci.exceptions import ServiceError
+
+        try:
+            return list(iterRecords(client.list_user_group_memberships,
+                                    compartment_id=self.tenancyId))
+        except ServiceError as e:
+            if e.status != 400:
+                raise
+
+        # Tenancies that insist on a user or group filter: one listing per group
+        # is still far fewer calls than one per user.
+        memberships = []
+        for groupId in self.groups:
+            memberships.extend(iterRecords(
+                client.list_user_group_memberships,
+                compartment_id=self.tenancyId, group_id=groupId))
+        return memberships
+
+    def groupsForUser(self, userId):
+        return [self.groups[g] for g in self.groupsByUser.get(userId, ())
+                if g in self.groups]
+
+    def usersInGroup(self, groupId):
+        return [self.users[u] for u in self.usersByGroup.get(groupId, ())
+                if u in self.users]
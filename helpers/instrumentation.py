@@ -0,0 +1,353 @@
+#########################################################################################
+# Filename    : instrumentation.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Per-call metrics, method profiling and logging setup for OCISDK
+#########################################################################################
+
+import atexit
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# "" off; anything else prints the summary table to stderr at exit, and a path
+# ending in .json / .prom also gets that export written
+METRICS_OUTPUT = os.environ.get("OCISDK_METRICS", "")
+
+# comma separated OCISDK method names to run under cProfile ("*" for all public
+# ones); one .prof file per method is written to PROFILE_DIR at exit
+PROFILE_METHODS = [m.strip() for m in os.environ.get("OCISDK_PROFILE", "").split(",")
+                   if m.strip()]
+PROFILE_DIR = os.environ.get("OCISDK_PROFILE_DIR", os.path.join("Reports", "profiles"))
+
+# level for the helpers.* loggers (DEBUG shows every listed resource); unset
+# leaves logging to the application, which by default shows warnings only
+LOG_LEVEL = os.environ.get("OCISDK_LOG_LEVEL", "")
+LOG_FORMAT = "%(asctime)s level=%(levelname)s logger=%(name)s %(message)s"
+
+# latency histogram bucket bounds, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# operations whose every response is one page of a listing
+PAGED_PREFIXES = ("list_", "search_", "request_summarized_")
+
+
+def configureLogging(level=LOG_LEVEL):
+    """Sends helpers.* log records to stderr at `level`; a no-op when unset."""
+
+    if not level:
+        return
+    logger = logging.getLogger("helpers")
+    logger.setLevel(level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, Prometheus style."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # interpolated within the bucket holding the q-th observation, as
+        # Prometheus' histogram_quantile does; max beyond the last bucket
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class OperationStats:
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.pages = 0
+        self.bytes = 0
+        self.retries = 0
+        self.throttles = 0
+
+    def toDict(self):
+        return {
+            "calls": self.latency.count,
+            "errors": self.errors,
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "seconds": round(self.latency.sum, 6),
+            "p50": self.latency.quantile(0.5),
+            "p95": self.latency.quantile(0.95),
+            "max": round(self.latency.max, 6),
+        }
+
+
+class CallMetrics:
+    """
+    Per (service, operation) latency histograms and counters of pages, response
+    bytes, retries and 429s. SDK calls are recorded by InstrumentedClient;
+    phase() times any block of a script under service "phase".
+    """
+
+    def __init__(self):
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, service, operation, seconds, error=False, pages=0, size=0,
+               retries=0, throttles=0):
+        with self._lock:
+            stats = self.operations.get((service, operation))
+            if stats is None:
+                stats = self.operations[(service, operation)] = OperationStats()
+            stats.latency.observe(seconds)
+            stats.errors += bool(error)
+            stats.pages += pages
+            stats.bytes += size
+            stats.retries += retries
+            stats.throttles += throttles
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record("phase", name, time.perf_counter() - start, error=error)
+
+    def toJSON(self):
+        with self._lock:
+            return {f"{service}.{operation}": stats.toDict()
+                    for (service, operation), stats in sorted(self.operations.items())}
+
+    def toPrometheus(self):
+        lines = []
+        with self._lock:
+            items = sorted(self.operations.items())
+
+            lines += ["# HELP ocisdk_call_duration_seconds Latency of OCI SDK calls.",
+                      "# TYPE ocisdk_call_duration_seconds histogram"]
+            for (service, operation), stats in items:
+                labels = f'service="{service}",operation="{operation}"'
+                for bound, count in stats.latency.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'ocisdk_call_duration_seconds_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"ocisdk_call_duration_seconds_sum{{{labels}}} {stats.latency.sum}")
+                lines.append(f"ocisdk_call_duration_seconds_count{{{labels}}} {stats.latency.count}")
+
+            for name, field, help in (("errors", "errors", "Failed calls."),
+                                      ("pages", "pages", "Listing pages fetched."),
+                                      ("response_bytes", "bytes", "Response body bytes."),
+                                      ("retries", "retries", "Retried attempts."),
+                                      ("throttles", "throttles", "429 responses.")):
+                lines += [f"# HELP ocisdk_{name}_total {help}",
+                          f"# TYPE ocisdk_{name}_total counter"]
+                for (service, operation), stats in items:
+                    lines.append(f'ocisdk_{name}_total{{service="{service}",'
+                                 f'operation="{operation}"}} {getattr(stats, field)}')
+
+        return "\n".join(lines) + "\n"
+
+    def summaryTable(self):
+        rows = sorted(self.toJSON().items(), key=lambda item: -item[1]["seconds"])
+        lines = [f"{'operation':<48}{'calls':>7}{'err':>5}{'pages':>7}{'KiB':>9}"
+                 f"{'retry':>7}{'429':>6}{'total s':>10}{'p50 s':>8}{'p95 s':>8}{'max s':>8}"]
+        for name, s in rows:
+            lines.append(f"{name:<48}{s['calls']:>7}{s['errors']:>5}{s['pages']:>7}"
+                         f"{s['bytes'] / 1024:>9.1f}{s['retries']:>7}{s['throttles']:>6}"
+                         f"{s['seconds']:>10.2f}{s['p50']:>8.3f}{s['p95']:>8.3f}{s['max']:>8.3f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        # JSON or Prometheus text, by extension
+        with open(path, "w") as f:
+            if path.endswith(".prom"):
+                f.write(self.toPrometheus())
+            else:
+                json.dump(self.toJSON(), f, indent=2)
+
+    def report(self, output=METRICS_OUTPUT):
+        if not output or not self.operations:
+            return
+        print(self.summaryTable(), file=sys.stderr)
+        if output.endswith((".json", ".prom")):
+            self.export(output)
+
+
+def _responseSize(response):
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return int(headers.get("content-length") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class InstrumentedClient:
+    """
+    Wraps an OCI client (or its ThrottledClient) and records every operation in
+    a CallMetrics: latency including throttling waits, the retries and 429s the
+    controller saw, pages and response bytes.
+    """
+
+    def __init__(self, client, metrics, service, controller=None):
+        self._client = client
+        self._metrics = metrics
+        self._service = service
+        self._controller = controller
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        metrics, service, controller = self._metrics, self._service, self._controller
+        paged = name.startswith(PAGED_PREFIXES)
+
+        @functools.wraps(attr)
+        def instrumented(*args, **kwargs):
+            start = time.perf_counter()
+            response = None
+            error = True
+            try:
+                response = attr(*args, **kwargs)
+                error = False
+                return response
+            finally:
+                retries, throttles = controller.lastCall() if controller else (0, 0)
+                metrics.record(service, name, time.perf_counter() - start,
+                               error=error,
+                               pages=int(paged and not error),
+                               size=_responseSize(response),
+                               retries=retries, throttles=throttles)
+
+        return instrumented
+
+
+class MethodProfiler:
+    """
+    One cProfile.Profile per method name, accumulated over every call. Only the
+    outermost profiled call of one thread at a time is captured: cProfile can't
+    nest, and other threads run unprofiled while a capture is on.
+    """
+
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = directory
+        self.profiles = {}
+        self._busy = threading.Lock()
+
+    def _run(self, name, func, *args, **kwargs):
+        if not self._busy.acquire(blocking=False):
+            return func(*args, **kwargs)
+
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        try:
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+        finally:
+            self._busy.release()
+
+    def wrap(self, name, method):
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def profiledGenerator(*args, **kwargs):
+                # profile each step, so the calls made while producing items count
+                items = method(*args, **kwargs)
+                sentinel = object()
+                while True:
+                    item = self._run(name, next, items, sentinel)
+                    if item is sentinel:
+                        return
+                    yield item
+
+            return profiledGenerator
+
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            return self._run(name, method, *args, **kwargs)
+
+        return profiled
+
+    def instrument(self, obj, names=PROFILE_METHODS):
+        # replaces the named public methods on this one instance
+        if "*" in names:
+            names = [n for n, m in inspect.getmembers(type(obj), inspect.isfunction)
+                     if not n.startswith("_")]
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def dump(self):
+        if not self.profiles:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for name, profile in self.profiles.items():
+            path = os.path.join(self.directory, f"{name}.{os.getpid()}.prof")
+            profile.dump_stats(path)
+            print(f"Profile of {name} written to {path}", file=sys.stderr)
+
+
+_processMetrics = None
+_processProfiler = None
+_processLock = threading.Lock()
+
+
+def processMetrics():
+    # the CallMetrics shared by every OCISDK in the process, reported at exit
+    global _processMetrics
+
+    with _processLock:
+        if _processMetrics is None:
+            _processMetrics = CallMetrics()
+            atexit.register(_processMetrics.report)
+        return _processMetrics
+
+
+def processProfiler():
+    global _processProfiler
+
+    with _processLock:
+        if _processProfiler is None:
+            _processProfiler = MethodProfiler()
+            atexit.register(_processProfiler.dump)
+        return _processProfiler
@@ -0,0 +1,278 @@
+#########################################################################################
+# Filename    : mockserver.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Local in-process OCI / SSH endpoints used by the benchmark scripts
+#########################################################################################
+
+import json
+import logging
+import os
+import re
+import socket
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOCIServer:
+    """
+    Serves canned JSON on 127.0.0.1. Handlers are registered per method and path
+    regex and return (status, headers, payload); payload is JSON encoded unless
+    it is already bytes.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.routes = []
+        self.requestCount = 0
+        self.connectionCount = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handlerClass())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, method, pattern, handler):
+        self.routes.append((method, re.compile(pattern), handler))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _dispatch(self, request, method):
+        with self._lock:
+            self.requestCount += 1
+
+        path, _, query = request.path.partition("?")
+        length = int(request.headers.get("content-length") or 0)
+        body = request.rfile.read(length) if length else b""
+
+        for routeMethod, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if routeMethod == method and match:
+                status, headers, payload = handler(match, query, body)
+                break
+        else:
+            status, headers, payload = 404, {}, {"code": "NotFound",
+                                                 "message": path}
+
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload, default=str).encode()
+
+        request.send_response(status)
+        request.send_header("content-type", "application/json")
+        request.send_header("content-length", str(len(payload)))
+        request.send_header("opc-request-id", str(self.requestCount))
+        for key, value in headers.items():
+            request.send_header(key, str(value))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def _handlerClass(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in separate writes; without TCP_NODELAY
+            # each keep-alive response stalls on the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connectionCount += 1
+
+            def do_GET(self):
+                server._dispatch(self, "GET")
+
+            def do_POST(self):
+                server._dispatch(self, "POST")
+
+            def do_PUT(self):
+                server._dispatch(self, "PUT")
+
+            def do_DELETE(self):
+                server._dispatch(self, "DELETE")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class MockSSHServer:
+    """
+    Accepts SSH logins signed by `authorizedKey` on 127.0.0.1 and runs exec
+    requests as local shell commands, with the channel wired to the process's
+    stdin / stdout / stderr. Counts connections so reuse can be checked.
+    """
+
+    def __init__(self, authorizedKey, host="127.0.0.1", port=0):
+        import paramiko
+
+        # clients dropping their connections is routine here, not worth a
+        # "Socket exception: Connection reset by peer" per host
+        logging.getLogger("paramiko.transport").setLevel(logging.CRITICAL)
+        self.authorizedKey = authorizedKey
+        self.hostKey = paramiko.RSAKey.generate(2048)
+        self.connectionCount = 0
+        self.commandCount = 0
+        self._lock = threading.Lock()
+        self._transports = []
+        self._socket = socket.create_server((host, port))
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._socket.getsockname()[:2]
+        return f"{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._socket.close()
+        for transport in self._transports:
+            transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _accept(self):
+        import paramiko
+
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+
+            with self._lock:
+                self.connectionCount += 1
+
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self.hostKey)
+            transport.start_server(server=self._interface())
+            self._transports.append(transport)
+
+    def _exec(self, channel, command):
+        with self._lock:
+            self.commandCount += 1
+
+        proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        def pumpIn():
+            try:
+                while True:
+                    data = channel.recv(32768)
+                    if not data:
+                        break
+                    proc.stdin.write(data)
+                proc.stdin.close()
+            except (OSError, ValueError):
+                pass
+
+        def pumpOut(source, send):
+            try:
+                for data in iter(lambda: source.read1(32768), b""):
+                    send(data)
+            except (OSError, EOFError):
+                pass
+
+        pumps = [threading.Thread(target=pumpIn, daemon=True),
+                 threading.Thread(target=pumpOut, args=(proc.stdout, channel.sendall)),
+                 threading.Thread(target=pumpOut, args=(proc.stderr, channel.sendall_stderr))]
+        for pump in pumps:
+            pump.start()
+        for pump in pumps[1:]:
+            pump.join()
+
+        try:
+            channel.send_exit_status(proc.wait())
+            channel.close()
+        except (OSError, EOFError):
+            # client hung up before reading the exit status
+            pass
+
+    def _interface(self):
+        import paramiko
+
+        server = self
+
+        class Interface(paramiko.ServerInterface):
+            def get_allowed_auths(self, username):
+                return "publickey"
+
+            def check_auth_publickey(self, username, key):
+                if key == server.authorizedKey:
+                    return paramiko.AUTH_SUCCESSFUL
+                return paramiko.AUTH_FAILED
+
+            def check_channel_request(self, kind, chanid):
+                if kind == "session":
+                    return paramiko.OPEN_SUCCEEDED
+                return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+            def check_channel_exec_request(self, channel, command):
+                threading.Thread(target=server._exec,
+                                 args=(channel, command.decode()), daemon=True).start()
+                return True
+
+        return Interface()
+
+
+def makeTestConfig(directory, region="us-ashburn-1"):
+    # A syntactically valid profile backed by a throwaway key, so requests to the
+    # mock server are signed exactly as they would be against the real API.
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    keyFile = os.path.join(directory, "mock_key.pem")
+    with open(keyFile, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM,
+                                  serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+
+    return {
+        "user": "ocid1.user.oc1..mockuser",
+        "tenancy": "ocid1.tenancy.oc1..mocktenancy",
+        "fingerprint": ":".join(["00"] * 16),
+        "key_file": keyFile,
+        "region": region,
+    }
+
+
+def makeTestConfigFile(directory, profile="DEFAULT", region="us-ashburn-1"):
+    # same profile as makeTestConfig, written out for OCISDK(configFile=...)
+    cfg = makeTestConfig(directory, region=region)
+    path = os.path.join(directory, "config")
+
+    with open(path, "w") as f:
+        f.write(f"[{profile}]\n")
+        for key, value in cfg.items():
+            f.write(f"{key}={value}\n")
+
+    return path
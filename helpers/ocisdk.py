@@ -8,186 +8,333 @@
 #########################################################################################
 
 import datetime
+import logging
 import os
-
-import oci
-
-from .utils import getProfilesFromConfig
+import threading
+import time
+
+from .addresses import resolveAddresses
+from .capacity import CAPACITY_KEYS, CapacityError, aggregateCapacity
+from .clients import DEFAULT_POOL_SIZE, ClientRegistry
+from .compartments import CompartmentTree
+from .concurrency import RateLimiter, fanOut
+from .identity import IdentitySnapshot, groupToDict, userToDict
+from .instrumentation import (PROFILE_METHODS, configureLogging, processMetrics,
+                              processProfiler)
+from .inventory import crawlInventory
+from .pagination import iterRecords
+from .profiles import ProfileRegistry
+from .responsecache import ResponseCache
+from .search import buildQuery, quote, searchResources, tagPredicate
+from .throttle import processController
+from .usagecube import (CUBE_GROUP_BY, REPORT_COMPARTMENT_DEPTH, USAGE_COMPARTMENT_DEPTH,
+                        UsageCube)
+from .usagestore import contiguousRanges, dayRange
+from .volumes import buildVolumeIndex, findUnattachedVolumes
+from .waiters import BatchWaiter
+
+log = logging.getLogger(__name__)
+configureLogging()
+
+# how long an unsettled usage day fetched by this process is reused
+USAGE_MEMO_TTL = 300
+
+# instance action -> lifecycle state the fleet scheduler waits for
+FLEET_ACTION_TARGETS = {
+    "START": "RUNNING",
+    "SOFTSTOP": "STOPPED",
+    "STOP": "STOPPED",
+}
+
+# instances no action can bring back; fleetAction skips them
+FLEET_GONE_STATES = ("TERMINATING", "TERMINATED")
 
 
 class OCISDK:
-    configs = {}
     today = datetime.datetime.now().replace(hour=0,
                                             minute=0,
                                             second=0,
                                             microsecond=0)
 
-    def __init__(self):
-
-        CONFIG_FILE_PATH = os.getcwd() + "/configs/config.oci"
-
-        profiles = getProfilesFromConfig(CONFIG_FILE_PATH)
-
-        for profile in profiles:
-            cfg = oci.config.from_file(file_location=CONFIG_FILE_PATH,
-                                       profile_name=profile)
-            self.configs[profile] = cfg
+    def __init__(self,
+                 configFile=None,
+                 serviceEndpoints=None,
+                 usageStore=None,
+                 addressCache=None,
+                 cache=None,
+                 throttle=True,
+                 metrics=True):
+
+        CONFIG_FILE_PATH = configFile or os.path.join(os.getcwd(), "configs",
+                                                      "config.oci")
+
+        # profiles are parsed on first access and validated on first use
+        self.configs = ProfileRegistry(CONFIG_FILE_PATH)
+
+        # identity snapshots and compartment trees per profile
+        self.snapshots = {}
+        self.compartmentTrees = {}
+        self._snapshotLock = threading.Lock()
+
+        # optional helpers.responsecache.ResponseCache (True for the default one)
+        # answering read-only calls across runs; mutating methods invalidate it
+        self.cache = ResponseCache() if cache is True else (cache or None)
+
+        # every call goes through a helpers.throttle.ThrottleController: the
+        # process-wide one by default, a given one, or none with throttle=False
+        self.controller = processController() if throttle is True else (throttle or None)
+
+        # per-call latency / pages / bytes / retries / 429s in a
+        # helpers.instrumentation.CallMetrics: the process-wide one (summarised
+        # at exit when OCISDK_METRICS is set) by default, a given one, or none
+        self.metrics = processMetrics() if metrics is True else (metrics or None)
+
+        # one shared client per (profile, service, region) instead of one per call
+        self.clients = ClientRegistry(self.configs,
+                                      serviceEndpoints=serviceEndpoints,
+                                      cache=self.cache,
+                                      controller=self.controller,
+                                      metrics=self.metrics)
+
+        # methods named in OCISDK_PROFILE run under cProfile
+        if PROFILE_METHODS:
+            processProfiler().instrument(self, PROFILE_METHODS)
+
+        # optional helpers.usagestore.UsageStore for the getDailyUsage* methods
+        self.usageStore = usageStore
+        self._usageMemo = {}
+
+        # optional helpers.addresses.AddressCache for resolveInstanceIPs
+        self.addressCache = addressCache
+
+    def invalidateCache(self, cfgName=None, *services):
+
+        # drop cached responses of a profile (all profiles when None), limited
+        # to the given services if any
+        if self.cache is None:
+            return
+        for service in services or (None,):
+            self.cache.invalidate(cfgName, service)
+
+    def streamCompartments(self, cfgName="DEFAULT", cached=True, lifecycleState=None):
+
+        identity_client = self.clients.get(cfgName, "identity", cached=cached)
+        kwargs = {"lifecycle_state": lifecycleState} if lifecycleState else {}
+
+        for cmp in iterRecords(identity_client.list_compartments,
+                               compartment_id=self.configs[cfgName]['tenancy'],
+                               compartment_id_in_subtree=True,
+                               **kwargs):
+            yield {'id' : cmp.id, 'name' : cmp.name, 'parent' : cmp.compartment_id}
 
     def getCompartments(self, as_array=False, cfgName="DEFAULT"):
 
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
-
-        compartmentList = identity_client.list_compartments(
-            compartment_id=self.configs[cfgName]['tenancy'],
-            compartment_id_in_subtree=True,
-        )
-
-        compartments = {self.configs[cfgName]['tenancy']: {"name": "root"}}
+        compartments = {self.configs[cfgName]['tenancy']: {"name": "root", "parent": None}}
         
         if as_array:
-            return [{'id' : cmp.id, 'name' : cmp.name} for cmp in compartmentList.data]
+            return list(self.streamCompartments(cfgName=cfgName))
         
         else:
-            for cmp in compartmentList.data:
-                compartments[cmp.id] = {"name": cmp.name}
+            for cmp in self.streamCompartments(cfgName=cfgName):
+                compartments[cmp['id']] = {"name": cmp['name'], "parent": cmp['parent']}
 
             return compartments
 
-    def getDailyUsageByService(self, date=today, cfgName="DEFAULT"):
+    def getCompartmentTree(self, cfgName="DEFAULT", refresh=False):
 
-        dts = date
-        dte = date + datetime.timedelta(days=1)
-
-        usage_client = oci.usage_api.UsageapiClient(self.configs[cfgName])
-
-        request_summarized_usages_response = usage_client.request_summarized_usages(
-            request_summarized_usages_details=oci.usage_api.models.
-            RequestSummarizedUsagesDetails(
-                tenant_id=self.configs[cfgName]['tenancy'],
-                time_usage_started=dts.isoformat() + "z",
-                time_usage_ended=dte.isoformat() + "z",
-                granularity="DAILY",
-                is_aggregate_by_time=False,
-                group_by=['service'],
-                compartment_depth=1),
-            page="1",
-            limit=868)
-
-        serviceUsage = {"date": dts, "list": [], "total": 0.0}
-        totalUsage = 0.0
-
-        for item in request_summarized_usages_response.data.items:
-            serviceName = str(item.service).replace(" ", "_")
-            usage = item.computed_amount if item.computed_amount is not None else 0.0
-
-            if float(usage) > 0:
-
-                serviceUsage["list"].append({
-                    "name": serviceName,
-                    "usage": usage
-                })
-                totalUsage += usage
+        # one paginated listing per profile, shared by usage, inventory and reports
+        tree = self.compartmentTrees.get(cfgName)
+
+        if tree is None or refresh:
+            tree = CompartmentTree(self.configs[cfgName]['tenancy'],
+                                   self.streamCompartments(cfgName=cfgName,
+                                                           cached=not refresh))
+            self.compartmentTrees[cfgName] = tree
+
+        return tree
+
+    def getInventory(self,
+                     resourceTypes="all",
+                     subtreeOf=None,
+                     hydrate=(),
+                     cfgName="DEFAULT",
+                     workers=DEFAULT_POOL_SIZE):
+
+        # every resource type across all compartments from streamed Resource
+        # Search pages; hydrate lists the types that also need their GET fields
+        tree = self.getCompartmentTree(cfgName) if subtreeOf is not None else None
+
+        return crawlInventory(self.clients, cfgName,
+                              resourceTypes=resourceTypes,
+                              tree=tree,
+                              subtreeOf=subtreeOf,
+                              hydrate=hydrate,
+                              workers=workers)
 
-        serviceUsage["total"] = totalUsage
+    def forEachCompartment(self,
+                           method,
+                           compartments=None,
+                           cfgName="DEFAULT",
+                           workers=DEFAULT_POOL_SIZE,
+                           **kwargs):
 
-        return serviceUsage
+        # method is any per-compartment OCISDK method (or its name), e.g.
+        # getAllVMs; results stream back as FanOutResult(compartmentId, result, error)
+        if isinstance(method, str):
+            method = getattr(self, method)
 
-    def getDailyUsageByCompartment(self, date=today, cfgName="DEFAULT"):
+        if compartments is None:
+            compartments = self.getCompartments(cfgName=cfgName)
 
-        dts = date
-        dte = date + datetime.timedelta(days=1)
+        compartmentIDs = [c["id"] if isinstance(c, dict) else c
+                          for c in compartments]
 
-        usage_client = oci.usage_api.UsageapiClient(self.configs[cfgName])
+        def call(compartmentID):
+            return method(compartmentID, cfgName=cfgName, **kwargs)
 
-        request_summarized_usages_response = usage_client.request_summarized_usages(
-            request_summarized_usages_details=oci.usage_api.models.
-            RequestSummarizedUsagesDetails(
-                tenant_id=self.configs[cfgName]['tenancy'],
-                time_usage_started=dts.isoformat() + "z",
-                time_usage_ended=dte.isoformat() + "z",
-                granularity="DAILY",
-                is_aggregate_by_time=True,
-                group_by=['compartmentId'],
-                compartment_depth=1),
-            page="1")
+        return fanOut(call, compartmentIDs, workers)
 
-        # print(request_summarized_usages_response.data)
+    def _fetchDailyUsage(self, start, end, groupBy, cfgName="DEFAULT"):
 
-        compartmentUsage = {"date": dts, "list": [], "total": 0.0}
+        from oci.usage_api.models import RequestSummarizedUsagesDetails
 
-        totalUsage = 0.0
+        usage_client = self.clients.get(cfgName, "usage")
 
-        for item in request_summarized_usages_response.data.items:
-            cmpId = str(item.compartment_id)
-            usage = item.computed_amount if item.computed_amount is not None else 0.0
+        # one multi-day request, every page, split back into days
+        rowsByDay = {day: [] for day in dayRange(start, end)}
 
-            if float(usage) > 0:
-                compartmentUsage["list"].append({
-                    "usage": usage,
-                    "compartmentId": cmpId
-                })
+        for item in iterRecords(
+                usage_client.request_summarized_usages,
+                request_summarized_usages_details=RequestSummarizedUsagesDetails(
+                    tenant_id=self.configs[cfgName]['tenancy'],
+                    time_usage_started=start.isoformat() + "T00:00:00z",
+                    time_usage_ended=end.isoformat() + "T00:00:00z",
+                    granularity="DAILY",
+                    is_aggregate_by_time=False,
+                    group_by=groupBy,
+                    compartment_depth=USAGE_COMPARTMENT_DEPTH)):
 
-            totalUsage += usage
+            day = item.time_usage_started.date()
+            row = {
+                "compartmentId": str(item.compartment_id),
+                "service": str(item.service),
+                "skuName": str(item.sku_name),
+                "usage": item.computed_amount if item.computed_amount is not None else 0.0,
+            }
+            if "resourceId" in groupBy:
+                row["resourceId"] = str(item.resource_id)
+            rowsByDay.setdefault(day, []).append(row)
 
-        compartmentUsage["total"] = totalUsage
+        return rowsByDay
 
-        return compartmentUsage
+    def getDailyUsageRange(self, start, end, groupBy=CUBE_GROUP_BY, cfgName="DEFAULT"):
 
-    def getDailyUsageByCompartmentAndService(self,
-                                             date=today,
-                                             cfgName="DEFAULT"):
+        # {date: rows} for [start, end); settled days come from the usage store,
+        # days fetched by this process in the last USAGE_MEMO_TTL seconds from memory
+        start = start.date() if isinstance(start, datetime.datetime) else start
+        end = end.date() if isinstance(end, datetime.datetime) else end
 
-        dts = date
-        dte = date + datetime.timedelta(days=1)
+        days = dayRange(start, end)
+        tenancy = self.configs[cfgName]['tenancy']
+        grouping = ",".join(groupBy) + f"@{USAGE_COMPARTMENT_DEPTH}"
 
-        usage_client = oci.usage_api.UsageapiClient(self.configs[cfgName])
+        result = {}
+        if self.usageStore is not None:
+            result = self.usageStore.load(tenancy, grouping, days)
+
+        now = time.monotonic()
+        for day in days:
+            memo = self._usageMemo.get((tenancy, grouping, day))
+            if day not in result and memo is not None and now - memo[0] < USAGE_MEMO_TTL:
+                result[day] = memo[1]
+
+        for rangeStart, rangeEnd in contiguousRanges(d for d in days if d not in result):
+            fetched = self._fetchDailyUsage(rangeStart, rangeEnd, groupBy, cfgName)
+            if self.usageStore is not None:
+                self.usageStore.save(tenancy, grouping, fetched)
+            for day, rows in fetched.items():
+                self._usageMemo[(tenancy, grouping, day)] = (now, rows)
+            result.update(fetched)
+
+        return {day: result.get(day, []) for day in days}
+
+    def getUsageCube(self, start, end, resourceLevel=False, cfgName="DEFAULT"):
 
-        request_summarized_usages_response = usage_client.request_summarized_usages(
-            request_summarized_usages_details=oci.usage_api.models.
-            RequestSummarizedUsagesDetails(
-                tenant_id=self.configs[cfgName]['tenancy'],
-                time_usage_started=dts.isoformat() + "z",
-                time_usage_ended=dte.isoformat() + "z",
-                granularity="DAILY",
-                is_aggregate_by_time=True,
-                group_by=['compartmentId', 'service'],
-                compartment_depth=1),
-            page="1")
+        # columnar cube for [start, end), per resource when resourceLevel is set
+        groupBy = CUBE_GROUP_BY + ['resourceId'] if resourceLevel else CUBE_GROUP_BY
 
-        # print(request_summarized_usages_response.data)
+        return UsageCube.fromRows(
+            self.getDailyUsageRange(start, end, groupBy, cfgName), dims=groupBy)
+
+    def getDailyUsageViews(self, date=today, cfgName="DEFAULT"):
 
-        compartmentUsage = {"date": dts, "list": [], "total": 0.0}
+        # all three daily breakdowns plus the total from a single usage-cube fetch
+        dts = date
+        day = date.date() if isinstance(date, datetime.datetime) else date
+
+        cube = self.getUsageCube(day, day + datetime.timedelta(days=1),
+                                 cfgName=cfgName)
+        total = cube.total()
+
+        # the cube holds leaf compartments; the views keep reporting top-level ones
+        tree = self.getCompartmentTree(cfgName)
+        depth = REPORT_COMPARTMENT_DEPTH
 
-        totalUsage = 0.0
+        byService = {"date": dts, "list": [], "total": 0.0}
+        for (svc, ), usage in cube.rollup(['service']).items():
+            if usage > 0:
+                byService["list"].append({
+                    "name": svc.replace(" ", "_"),
+                    "usage": usage
+                })
+                byService["total"] += usage
 
-        for item in request_summarized_usages_response.data.items:
-            cmpId = str(item.compartment_id)
-            svc = str(item.service)
-            usage = item.computed_amount if item.computed_amount is not None else 0.0
+        byCompartment = {"date": dts, "list": [], "total": total}
+        for (cmpId, ), usage in cube.rollup(['compartmentId'], depth, tree).items():
+            if usage > 0:
+                byCompartment["list"].append({
+                    "usage": usage,
+                    "compartmentId": cmpId
+                })
 
-            if float(usage) > 0:
-                compartmentUsage["list"].append({
+        byCompartmentAndService = {"date": dts, "list": [], "total": total}
+        for (cmpId, svc), usage in cube.rollup(['compartmentId', 'service'], depth, tree).items():
+            if usage > 0:
+                byCompartmentAndService["list"].append({
                     "usage": usage,
                     "service": svc,
                     "compartmentId": cmpId
                 })
 
-            totalUsage += usage
+        return {
+            "date": dts,
+            "service": byService,
+            "compartment": byCompartment,
+            "compartmentAndService": byCompartmentAndService,
+            "total": total,
+        }
 
-        compartmentUsage["total"] = totalUsage
+    def getDailyUsageByService(self, date=today, cfgName="DEFAULT"):
 
-        return compartmentUsage
+        return self.getDailyUsageViews(date, cfgName)["service"]
 
-    def getBudgetAlertRules(self, cfgName="DEFAULT"):
+    def getDailyUsageByCompartment(self, date=today, cfgName="DEFAULT"):
 
-        budget_client = oci.budget.BudgetClient(self.configs[cfgName])
-        budget_list_response = budget_client.list_budgets(
-            self.configs[cfgName]['tenancy'])
+        return self.getDailyUsageViews(date, cfgName)["compartment"]
 
-        budget_list = []
+    def getDailyUsageByCompartmentAndService(self,
+                                             date=today,
+                                             cfgName="DEFAULT"):
+
+        return self.getDailyUsageViews(date, cfgName)["compartmentAndService"]
 
-        for budget in budget_list_response.data:
-            budget_list.append({
+    def streamBudgetAlertRules(self, cfgName="DEFAULT"):
+
+        budget_client = self.clients.get(cfgName, "budget")
+
+        for budget in iterRecords(budget_client.list_budgets,
+                                  self.configs[cfgName]['tenancy']):
+            yield {
                 "compartment_id":
                 budget.targets[0],
                 "name":
@@ -200,230 +347,361 @@ class OCISDK:
                 (float(budget.actual_spend) / float(budget.amount) * 100.0),
                 "forecasted_spend":
                 budget.forecasted_spend
-            })
+            }
 
-        return budget_list
+    def getBudgetAlertRules(self, cfgName="DEFAULT"):
 
-    def getUserGroups(self, cfgName="DEFAULT"):
+        return list(self.streamBudgetAlertRules(cfgName=cfgName))
 
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
+    def streamUserGroups(self, cfgName="DEFAULT"):
 
-        groupsList = identity_client.list_groups(
-            compartment_id=self.configs[cfgName]['tenancy'])
+        identity_client = self.clients.get(cfgName, "identity")
 
-        groupsRes = []
+        for cmp in iterRecords(identity_client.list_groups,
+                               compartment_id=self.configs[cfgName]['tenancy']):
+            yield groupToDict(cmp)
 
-        for cmp in groupsList.data:
-            groupsRes.append({
-                "defined_tags": cmp.defined_tags,
-                "description": cmp.description,
-                "freeform_tags": cmp.freeform_tags,
-                "id": cmp.id,
-                "inactive_status": cmp.inactive_status,
-                "lifecycle_state": cmp.lifecycle_state,
-                "name": cmp.name,
-                "time_created": cmp.time_created,
-            })
+    def getUserGroups(self, cfgName="DEFAULT"):
 
-        return groupsRes
+        return list(self.streamUserGroups(cfgName=cfgName))
 
     def getUserDetails(self, userId, cfgName="DEFAULT"):
 
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
+        identity_client = self.clients.get(cfgName, "identity")
         result = identity_client.get_user(user_id=userId)
 
-        userDetail = {
-            "description": result.data.description,
-            "email": result.data.email,
-            "email_verified": result.data.email_verified,
-            "external_identifier": result.data.external_identifier,
-            "id": result.data.id,
-            "inactive_status": result.data.inactive_status,
-            "is_mfa_activated": result.data.is_mfa_activated,
-            "last_successful_login_time":
-            result.data.last_successful_login_time,
-            "name": result.data.name,
-            "previous_successful_login_time":
-            result.data.previous_successful_login_time,
-            "time_created": str(result.data.time_created),
-        }
+        userDetail = userToDict(result.data)
         return userDetail
 
+    def streamUsers(self, name=None, cfgName="DEFAULT"):
+
+        identity_client = self.clients.get(cfgName, "identity")
+        kwargs = {"name": name} if name is not None else {}
+
+        for usr in iterRecords(identity_client.list_users,
+                               compartment_id=self.configs[cfgName]['tenancy'],
+                               **kwargs):
+            yield userToDict(usr)
+
     def searchUser(self, name, cfgName="DEFAULT"):
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
-        result = identity_client.list_users(
-            name=name, compartment_id=self.configs[cfgName]['tenancy'])
-
-        usersList = []
-
-        for usr in result.data:
-            usersList.append({
-                "description": usr.description,
-                "email": usr.email,
-                "email_verified": usr.email_verified,
-                "external_identifier": usr.external_identifier,
-                "id": usr.id,
-                "inactive_status": usr.inactive_status,
-                "is_mfa_activated": usr.is_mfa_activated,
-                "last_successful_login_time": usr.last_successful_login_time,
-                "name": usr.name,
-                "previous_successful_login_time":
-                usr.previous_successful_login_time,
-                "time_created": str(usr.time_created),
-            })
 
-        return usersList
+        return list(self.streamUsers(name=name, cfgName=cfgName))
 
     def getGroupDetails(self, groupId, cfgName="DEFAULT"):
 
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
+        identity_client = self.clients.get(cfgName, "identity")
         result = identity_client.get_group(group_id=groupId)
 
-        groupDetail = {
-            "defined_tags": result.data.defined_tags,
-            "description": result.data.description,
-            "freeform_tags": result.data.freeform_tags,
-            "id": result.data.id,
-            "inactive_status": result.data.inactive_status,
-            "lifecycle_state": result.data.lifecycle_state,
-            "name": result.data.name,
-            "time_created": result.data.time_created,
-        }
+        groupDetail = groupToDict(result.data)
         return groupDetail
 
-    def getGroupsforUser(self, userId, cfgName="DEFAULT"):
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
+    def getIdentitySnapshot(self, cfgName="DEFAULT", refresh=False):
+
+        # built and refreshed under a lock, so fanned-out callers share one
+        # snapshot (and one set of listings) instead of racing to build their own
+        with self._snapshotLock:
+            snapshot = self.snapshots.get(cfgName)
+
+            if snapshot is None:
+                snapshot = IdentitySnapshot(self.clients.get(cfgName, "identity",
+                                                             cached=not refresh),
+                                            self.configs[cfgName]['tenancy'])
+                self.snapshots[cfgName] = snapshot
+            elif refresh:
+                # a refresh has to see current state, not cached responses
+                snapshot.refresh(self.clients.get(cfgName, "identity", cached=False))
+
+            return snapshot
 
-        groupsList = identity_client.list_user_group_memberships(
+    def getGroupsforUser(self, userId, cfgName="DEFAULT", useSnapshot=True):
+
+        if useSnapshot:
+            return self.getIdentitySnapshot(cfgName).groupsForUser(userId)
+
+        # useSnapshot=False: current state, at one GET per group
+        identity_client = self.clients.get(cfgName, "identity")
+
+        groupsList = iterRecords(
+            identity_client.list_user_group_memberships,
             compartment_id=self.configs[cfgName]['tenancy'], user_id=userId)
 
         # userGroups = [grp.group_id for grp in groupsList]
         userGroups = []
 
-        for grp in groupsList.data:
+        for grp in groupsList:
             userGroups.append(
                 self.getGroupDetails(groupId=grp.group_id, cfgName=cfgName))
 
         return userGroups
 
-    def getUsersInGroup(self, groupId, cfgName="DEFAULT"):
+    def getUsersInGroup(self, groupId, cfgName="DEFAULT", useSnapshot=True):
+
+        if useSnapshot:
+            return self.getIdentitySnapshot(cfgName).usersInGroup(groupId)
 
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
+        # useSnapshot=False: current state, at one GET per member
+        identity_client = self.clients.get(cfgName, "identity")
 
-        result = identity_client.list_user_group_memberships(
+        result = iterRecords(
+            identity_client.list_user_group_memberships,
             compartment_id=self.configs[cfgName]['tenancy'], group_id=groupId)
 
         userList = []
 
-        for res in result.data:
+        for res in result:
             userList.append(
                 self.getUserDetails(userId=res.user_id, cfgName=cfgName))
 
         return (userList)
 
-    def getAllClustersInCompartment(self, compartmentID, cfgName="DEFAULT"):
-
-        container_engine_client = oci.container_engine.ContainerEngineClient(
-            self.configs[cfgName])
+    def streamClusters(self, compartmentID, cfgName="DEFAULT"):
 
-        clusters = container_engine_client.list_clusters(
-            compartment_id=compartmentID)
+        container_engine_client = self.clients.get(cfgName, "containerengine")
 
-        result = []
-
-        for cluster in clusters.data:
-            result.append({
+        for cluster in iterRecords(container_engine_client.list_clusters,
+                                   compartment_id=compartmentID):
+            yield {
                 "name": cluster.name,
                 "id": cluster.id,
                 "kubernetes_version": cluster.kubernetes_version,
-            })
+            }
 
-        return result
-
-    def getAllPolicies(self, compartmentID, cfgName="DEFAULT"):
+    def getAllClustersInCompartment(self, compartmentID, cfgName="DEFAULT"):
 
-        identity_client = oci.identity.IdentityClient(self.configs[cfgName])
+        return list(self.streamClusters(compartmentID, cfgName=cfgName))
 
-        policiesList = identity_client.list_policies(
-            compartment_id=compartmentID)
+    def streamPolicies(self, compartmentID, cfgName="DEFAULT"):
 
-        policyRes = []
+        identity_client = self.clients.get(cfgName, "identity")
 
-        for pol in policiesList.data:
-            policyRes.append({
+        for pol in iterRecords(identity_client.list_policies,
+                               compartment_id=compartmentID):
+            yield {
                 "id": pol.id,
                 "name": pol.name,
                 "statements": list(pol.statements),
-            })
+            }
 
-        return policyRes
+    def getAllPolicies(self, compartmentID, cfgName="DEFAULT"):
 
-    def getAllVMs(self, compartmentID, cfgName="DEFAULT"):
-        
-        compute_engine_client = oci.core.ComputeClient(self.configs[cfgName])
-        
-        instanceList = oci.pagination.list_call_get_all_results(
-           compute_engine_client.list_instances, compartment_id=compartmentID, limit=100)
+        return list(self.streamPolicies(compartmentID, cfgName=cfgName))
+
+    def streamVMs(self, compartmentID, cfgName="DEFAULT"):
 
+        compute_engine_client = self.clients.get(cfgName, "compute")
 
-        # instanceList = compute_engine_client.list_instances(compartment_id=compartmentID)
-        # print(len(instanceList.data))
+        for vm in iterRecords(compute_engine_client.list_instances,
+                              compartment_id=compartmentID, limit=100):
+            yield self._vmToDict(vm)
+
+    def getAllVMs(self, compartmentID, cfgName="DEFAULT"):
+        
         result = []
 
-        for vm in instanceList.data:
-            result.append({
-                "name": vm.display_name,
-                "id": vm.id,
-                "state": vm.lifecycle_state,
-                "region" : vm.region,
-                "shape" : vm.shape,
-                "ocpu" : vm.shape_config.ocpus,
-                "memory" : vm.shape_config.memory_in_gbs,
-                
-            })
-            print(vm)
-        # print(result)
+        for vm in self.streamVMs(compartmentID, cfgName=cfgName):
+            result.append(vm)
+            log.debug("instance id=%s name=%s state=%s", vm["id"], vm["name"], vm["state"])
         return result
 
-    def getAllVMsByTag(self, compartmentID, tagKey, tagValue, cfgName="DEFAULT"):
-
+    def streamVMsByTag(self,
+                       compartmentID,
+                       tagKey,
+                       tagValue,
+                       cfgName="DEFAULT",
+                       workers=DEFAULT_POOL_SIZE):
+
+        # The tag predicate runs in Resource Search across the tenancy (or one
+        # compartment); only the matching instances are then fetched.
+        if not tagKey or not tagValue:
+            raise ValueError(f"tag filter needs a key and a value, got {tagKey!r}={tagValue!r}")
         tag_value_array = [v.strip() for v in tagValue.split(",")]
 
-        compute_engine_client = oci.core.ComputeClient(self.configs[cfgName])
-        
-        instanceList = compute_engine_client.list_instances(compartment_id=compartmentID)
-        # print(instanceList.data)
-        result = []
+        predicates = [tagPredicate(tagKey, tag_value_array)]
+        if compartmentID is not None:
+            predicates.append(f"compartmentId = {quote(compartmentID)}")
 
-        freeform_tagged_instances = [i for i in instanceList.data if tagKey in i.freeform_tags and i.freeform_tags[tagKey] in tag_value_array]
-        defined_tagged_instances = [i for i in instanceList.data if tagKey in i.defined_tags and i.defined_tags[tagKey] in tag_value_array]
+        matches = searchResources(self.clients.get(cfgName, "search"),
+                                  buildQuery(["instance"], predicates))
+        instanceIDs = [res.identifier for res in matches]
 
-        # Combine the filtered instances into a single list
-        tagged_instances = freeform_tagged_instances + defined_tagged_instances
+        compute_engine_client = self.clients.get(cfgName, "compute")
 
-        for vm in tagged_instances:
-            result.append({
-                "name": vm.display_name,
-                "id": vm.id,
-                "state": vm.lifecycle_state,
-                "region" : vm.region,
-                "shape" : vm.shape,
-                "ocpu" : vm.shape_config.ocpus,
-                "memory" : vm.shape_config.memory_in_gbs,
-                
-            })
+        def getInstance(instanceID):
+            return compute_engine_client.get_instance(instanceID).data
 
-        return result
+        for res in fanOut(getInstance, instanceIDs, workers):
+            if res.error is not None:
+                log.warning("error fetching instance id=%s: %s", res.key, res.error)
+                continue
+            yield self._vmToDict(res.result)
 
-    def getVolumesForVM(self, compartmentID, instanceID, cfgName="DEFAULT"):
-        compute_engine_client = oci.core.ComputeClient(self.configs[cfgName])
-        block_storage_client = oci.core.BlockstorageClient(self.configs[cfgName])
+    def getAllVMsByTag(self, compartmentID, tagKey, tagValue, cfgName="DEFAULT"):
 
-        volumeAttachmentList = compute_engine_client.list_volume_attachments(compartment_id=compartmentID, instance_id=instanceID)
+        return list(self.streamVMsByTag(compartmentID, tagKey, tagValue,
+                                        cfgName=cfgName))
+
+    def resolveInstanceIPs(self,
+                           vms,
+                           cfgName="DEFAULT",
+                           refresh=False,
+                           workers=DEFAULT_POOL_SIZE):
+
+        # {instance id: {private_ip, public_ip, hostname}} for getAllVMs /
+        # getAllVMsByTag output; only instances missing from the address cache
+        # cost API calls
+        vms = list(vms)
+        tenancy = self.configs[cfgName]['tenancy']
+
+        addresses = {}
+        if self.addressCache is not None and not refresh:
+            addresses = self.addressCache.load(tenancy, [vm["id"] for vm in vms])
+        elif refresh:
+            self.invalidateCache(cfgName, "compute", "network")
+
+        missing = [vm for vm in vms if vm["id"] not in addresses]
+        if missing:
+            fetched = resolveAddresses(self.clients, cfgName, missing, workers)
+            if self.addressCache is not None:
+                now = time.time()
+                self.addressCache.save(tenancy, {i: dict(a, fetched_at=now)
+                                                 for i, a in fetched.items()})
+            addresses.update(fetched)
+
+        return addresses
+
+    def selectInstances(self,
+                        compartmentID=None,
+                        tagKey=None,
+                        tagValue=None,
+                        state="RUNNING",
+                        cfgName="DEFAULT",
+                        refresh=False,
+                        workers=DEFAULT_POOL_SIZE):
+
+        # (vms, {instance id: address}) for the instances in `state` tagged
+        # tagKey=tagValue (tenancy-wide or within compartmentID) or, without a
+        # tag, all of compartmentID. With an address cache the whole selection
+        # is reused for its TTL, so a rerun makes no API calls at all.
+        tenancy = self.configs[cfgName]['tenancy']
+        selector = f"{compartmentID}|{tagKey}={tagValue}|{state}"
+
+        if self.addressCache is not None and not refresh:
+            cached = self.addressCache.loadSelection(tenancy, selector)
+            if cached is not None:
+                return cached
+
+        if refresh:
+            # the listings below go through cached clients
+            self.invalidateCache(cfgName, "compute", "search", "network")
+
+        if tagKey:
+            vms = self.getAllVMsByTag(compartmentID, tagKey, tagValue, cfgName=cfgName)
+        else:
+            vms = list(self.streamVMs(compartmentID, cfgName=cfgName))
+        vms = [vm for vm in vms if state is None or vm["state"] == state]
+
+        addresses = self.resolveInstanceIPs(vms, cfgName=cfgName, refresh=refresh,
+                                            workers=workers)
+        if self.addressCache is not None:
+            self.addressCache.saveSelection(tenancy, selector, vms, addresses)
+
+        return vms, addresses
+
+    def getCapacity(self,
+                    compartments=None,
+                    by=CAPACITY_KEYS,
+                    cfgName="DEFAULT",
+                    workers=DEFAULT_POOL_SIZE):
+
+        # OCPU / memory totals from list_instances data only, no get_instance.
+        # If any compartment fails, CapacityError carries the partial result.
+        vms = []
+        errors = {}
+
+        def listVMs(compartmentID, cfgName):
+            return list(self.streamVMs(compartmentID, cfgName=cfgName))
+
+        for res in self.forEachCompartment(listVMs,
+                                           compartments=compartments,
+                                           cfgName=cfgName,
+                                           workers=workers):
+            if res.error is not None:
+                log.warning("error listing instances compartment=%s: %s", res.key, res.error)
+                errors[res.key] = res.error
+                continue
+            vms.extend(res.result)
+
+        capacity = aggregateCapacity(vms, by=by)
+        if errors:
+            raise CapacityError(errors, capacity)
+        return capacity
+
+    def getAvailabilityDomains(self, cfgName="DEFAULT"):
+
+        identity_client = self.clients.get(cfgName, "identity")
+
+        return [ad.name for ad in identity_client.list_availability_domains(
+            self.configs[cfgName]['tenancy']).data]
+
+    def _compartmentIDs(self, compartments, subtreeOf, cfgName):
+
+        if compartments is not None:
+            return [c["id"] if isinstance(c, dict) else c for c in compartments]
+
+        tree = self.getCompartmentTree(cfgName)
+        return tree.subtree(subtreeOf or tree.rootId)
+
+    def _activeCompartmentIDs(self, cfgName):
+
+        # the tenancy and its ACTIVE compartments; deleted ones hold no live
+        # attachments and listing them only adds requests that can fail
+        return [self.configs[cfgName]['tenancy']] + [
+            cmp['id'] for cmp in self.streamCompartments(cfgName=cfgName,
+                                                         lifecycleState="ACTIVE")]
+
+    def getVolumeIndex(self,
+                       compartments=None,
+                       subtreeOf=None,
+                       cfgName="DEFAULT",
+                       workers=DEFAULT_POOL_SIZE):
+
+        # all volumes and boot volumes of the given compartments (default: the
+        # whole tree, or one subtree) and the attachments of every ACTIVE
+        # compartment, listed once and joined
+        return buildVolumeIndex(self.clients, cfgName,
+                                self._compartmentIDs(compartments, subtreeOf, cfgName),
+                                self.getAvailabilityDomains(cfgName),
+                                workers,
+                                attachmentCompartmentIDs=self._activeCompartmentIDs(cfgName))
+
+    def streamUnattachedVolumes(self,
+                                compartments=None,
+                                subtreeOf=None,
+                                cfgName="DEFAULT",
+                                workers=DEFAULT_POOL_SIZE):
+
+        # block and boot volumes with no live attachment, with size and age;
+        # attachments are listed in every ACTIVE compartment whatever the volume scope
+        return findUnattachedVolumes(self.clients, cfgName,
+                                     self._compartmentIDs(compartments, subtreeOf, cfgName),
+                                     self.getAvailabilityDomains(cfgName),
+                                     workers,
+                                     attachmentCompartmentIDs=self._activeCompartmentIDs(cfgName))
+
+    def getVolumesForVM(self, compartmentID, instanceID, cfgName="DEFAULT",
+                        volumeIndex=None):
+
+        if volumeIndex is not None:
+            return volumeIndex.forInstance(instanceID)
+
+        compute_engine_client = self.clients.get(cfgName, "compute")
+        block_storage_client = self.clients.get(cfgName, "blockstorage")
+
+        volumeAttachmentList = iterRecords(compute_engine_client.list_volume_attachments, compartment_id=compartmentID, instance_id=instanceID)
 
         result = []
 
-        for volAttachment in volumeAttachmentList.data:
+        for volAttachment in volumeAttachmentList:
 
             volDetails=block_storage_client.get_volume(volAttachment.volume_id)
             #print(volDetails.data)
@@ -436,93 +714,233 @@ class OCISDK:
             
         return result
 
+    def deleteVolume(self, volumeID, cfgName="DEFAULT"):
+
+        block_storage_client = self.clients.get(cfgName, "blockstorage", cached=False)
+
+        volume = block_storage_client.get_volume(volumeID).data
+        block_storage_client.delete_volume(volumeID)
+
+        # volume listings, attachments and search results all mention it
+        self.invalidateCache(cfgName, "blockstorage", "compute", "search")
+        return volume
+
+    def deleteVolumes(self,
+                      volumeIDs,
+                      dryRun=False,
+                      wait=True,
+                      cfgName="DEFAULT",
+                      workers=DEFAULT_POOL_SIZE):
+
+        # delete concurrently, then follow every deletion to TERMINATED with a
+        # single shared polling loop; one outcome dict per volume
+        volumeIDs = list(dict.fromkeys(volumeIDs))
+        block_storage_client = self.clients.get(cfgName, "blockstorage", cached=False)
+        outcomes = {}
+
+        def deleteOne(volumeID):
+            if dryRun:
+                return block_storage_client.get_volume(volumeID).data
+            return self.deleteVolume(volumeID, cfgName=cfgName)
+
+        for res in fanOut(deleteOne, volumeIDs, workers):
+            outcome = {"id": res.key, "name": None, "size_gb": None,
+                       "action": "dry-run" if dryRun else "delete",
+                       "state": None, "error": None}
+            if res.error is not None:
+                outcome["state"] = "FAILED"
+                outcome["error"] = str(getattr(res.error, "message", res.error))
+            else:
+                outcome["name"] = res.result.display_name
+                outcome["size_gb"] = res.result.size_in_gbs
+                outcome["state"] = res.result.lifecycle_state if dryRun else "TERMINATING"
+            outcomes[res.key] = outcome
+
+        deleted = [o["id"] for o in outcomes.values() if o["state"] == "TERMINATING"]
+
+        if wait and deleted:
+            waiter = BatchWaiter(
+                lambda volumeID: block_storage_client.get_volume(volumeID).data.lifecycle_state,
+                targetStates=["TERMINATED"],
+                failedStates=["FAULTY"],
+                goneState="TERMINATED",
+                workers=workers)
+
+            for volumeID, state in waiter.wait(deleted).items():
+                outcomes[volumeID]["state"] = state
+
+            self.invalidateCache(cfgName, "blockstorage", "compute", "search")
+
+        return [outcomes[v] for v in volumeIDs if v in outcomes]
+
     def startInstance(self, instanceID, cfgName="DEFAULT"):
-        compute_engine_client = oci.core.ComputeClient(self.configs[cfgName])
+        compute_engine_client = self.clients.get(cfgName, "compute", cached=False)
 
         # Start the instance
         response = compute_engine_client.instance_action(instanceID, 'START')
+        self.invalidateCache(cfgName, "compute", "search")
 
-        # Print the response
-        print(response.data)
+        log.info("instance_action action=%s id=%s state=%s",
+                 'START', instanceID, response.data.lifecycle_state)
         return response.data
 
     def stopInstance(self, instanceID, cfgName="DEFAULT"):
-        compute_engine_client = oci.core.ComputeClient(self.configs[cfgName])
+        compute_engine_client = self.clients.get(cfgName, "compute", cached=False)
 
         # Stop the instance
         response = compute_engine_client.instance_action(instanceID, 'SOFTSTOP')
+        self.invalidateCache(cfgName, "compute", "search")
 
-        # Print the response
-        print(response.data)
+        log.info("instance_action action=%s id=%s state=%s",
+                 'SOFTSTOP', instanceID, response.data.lifecycle_state)
         return response.data
 
+    def fleetAction(self,
+                    action,
+                    instanceIDs=None,
+                    tagKey=None,
+                    tagValue=None,
+                    compartmentID=None,
+                    ratePerSecond=10,
+                    wait=True,
+                    cfgName="DEFAULT",
+                    workers=DEFAULT_POOL_SIZE):
+
+        # Targets come from an explicit list, a tag (optionally within one
+        # compartment) or a whole compartment. Actions are issued concurrently
+        # under a rate limit, then one batched loop polls every instance to
+        # its target state. Returns one outcome dict per instance.
+        targetState = FLEET_ACTION_TARGETS[action]
+        compute_engine_client = self.clients.get(cfgName, "compute", cached=False)
+
+        # the skip decision below needs current states, not cached ones
+        self.invalidateCache(cfgName, "compute", "search")
+
+        if instanceIDs is not None:
+            targets = [{"id": i, "name": None, "state": None}
+                       for i in dict.fromkeys(instanceIDs)]
+        elif tagKey is not None:
+            targets = self.getAllVMsByTag(compartmentID, tagKey, tagValue,
+                                          cfgName=cfgName)
+        elif compartmentID is not None:
+            targets = list(self.streamVMs(compartmentID, cfgName=cfgName))
+        else:
+            raise ValueError("fleetAction needs instanceIDs, a tag or a compartmentID")
+
+        outcomes = {}
+        toAct = []
+
+        for vm in targets:
+            outcomes[vm["id"]] = {"id": vm["id"], "name": vm["name"],
+                                  "action": action, "previous_state": vm["state"],
+                                  "state": vm["state"], "error": None}
+            if vm["state"] == targetState or vm["state"] in FLEET_GONE_STATES:
+                outcomes[vm["id"]]["action"] = "skipped"
+            else:
+                toAct.append(vm["id"])
+
+        limiter = RateLimiter(ratePerSecond)
+
+        def act(instanceID):
+            limiter.acquire()
+            return compute_engine_client.instance_action(instanceID, action).data
+
+        issued = []
+        for res in fanOut(act, toAct, workers):
+            outcome = outcomes[res.key]
+            if res.error is not None:
+                outcome["state"] = "FAILED"
+                outcome["error"] = str(getattr(res.error, "message", res.error))
+                continue
+            outcome["name"] = outcome["name"] or res.result.display_name
+            outcome["state"] = res.result.lifecycle_state
+            issued.append(res.key)
+
+        if wait and issued:
+            waiter = BatchWaiter(
+                lambda instanceID: compute_engine_client.get_instance(instanceID).data.lifecycle_state,
+                targetStates=[targetState],
+                failedStates=list(FLEET_GONE_STATES),
+                workers=workers)
+
+            for instanceID, state in waiter.wait(issued).items():
+                outcomes[instanceID]["state"] = state
+
+        if issued:
+            self.invalidateCache(cfgName, "compute", "search")
+
+        return list(outcomes.values())
+
+    @staticmethod
+    def _vmToDict(vm):
+        shape = vm.shape_config
+
+        return {
+            "name": vm.display_name,
+            "id": vm.id,
+            "compartment_id": vm.compartment_id,
+            "state": vm.lifecycle_state,
+            "region" : vm.region,
+            "shape" : vm.shape,
+            "ocpu" : shape.ocpus if shape is not None else None,
+            "memory" : shape.memory_in_gbs if shape is not None else None,
+        }
+
+    def streamFirewallPolicies(self, compartmentID, cfgName="DEFAULT"):
+
+        waas_client = self.clients.get(cfgName, "waas")
+
+        for policy in iterRecords(waas_client.list_waas_policies,
+                                  compartment_id=compartmentID):
+            yield {
+                "display_name": policy.display_name,
+                "domain": policy.domain,
+                "id": policy.id,
+                "lifecycle_state": policy.lifecycle_state,
+                "time_created": policy.time_created
+            }
+
     def getFirewallPolicies(self, compartmentID, cfgName="DEFAULT"):
 
-        waas_client = oci.waas.WaasClient(self.configs[cfgName])
+        return list(self.streamFirewallPolicies(compartmentID, cfgName=cfgName))
 
-        policy_list = waas_client.list_waas_policies(
-            compartment_id=compartmentID)
-        result = []
+    def streamFirewallPolicyProtectionRules(self, policyID, cfgName="DEFAULT"):
 
-        for policy in policy_list.data:
-            result.append(
-                {
-                    "display_name": policy.display_name,
-                    "domain": policy.domain,
-                    "id": policy.id,
-                    "lifecycle_state": policy.lifecycle_state,
-                    "time_created": policy.time_created
-                }
-            )
+        waas_client = self.clients.get(cfgName, "waas")
 
-        return result
+        for rule in iterRecords(waas_client.list_protection_rules,
+                                waas_policy_id=policyID, limit=100):
+            yield {
+                "name": rule.name,
+                "action" : rule.action,
+                "description" : rule.description,
+                "key" : rule.key,
+                "labels" : ' , '.join(map(str,rule.labels)),
+                "mod_security_rule_ids" : ' , '.join(map(str,rule.mod_security_rule_ids))
+            }
 
     def getFirewallPolicyProtectionRules(self, policyID, cfgName="DEFAULT"):
-        waas_client = oci.waas.WaasClient(self.configs[cfgName])
 
-        # rules_list = waas_client.list_protection_rules(
-        #     waas_policy_id=policyID, limit=100)
-        
-        rules_list = oci.pagination.list_call_get_all_results(
-            waas_client.list_protection_rules, waas_policy_id=policyID, limit=100)
+        return list(self.streamFirewallPolicyProtectionRules(policyID,
+                                                             cfgName=cfgName))
 
-        result = []
+    def streamFirewallPolicyRecommendations(self, policyID, cfgName="DEFAULT"):
 
-        for rule in rules_list.data:
-            result.append(
-                {
-                    "name": rule.name,
-                    "action" : rule.action,
-                    "description" : rule.description,
-                    "key" : rule.key,
-                    "labels" : ' , '.join(map(str,rule.labels)),
-                    "mod_security_rule_ids" : ' , '.join(map(str,rule.mod_security_rule_ids))
-                    
-                }
-            )
+        waas_client = self.clients.get(cfgName, "waas")
 
-        return result
+        for rule in iterRecords(waas_client.list_recommendations,
+                                waas_policy_id=policyID, limit=100):
+            yield {
+                "key" : rule.key,
+                "name": rule.name,
+                "mod_security_rule_ids" : ' , '.join(map(str,rule.mod_security_rule_ids)),
+                "recommended_action" : rule.recommended_action,
+                "description" : rule.description,
+                "labels" : ' , '.join(map(str,rule.labels))
+            }
 
     def getFirewallPolicyRecommendations(self, policyID, cfgName="DEFAULT"):
-        waas_client = oci.waas.WaasClient(self.configs[cfgName])
-        
-        rules_list = oci.pagination.list_call_get_all_results(
-            waas_client.list_recommendations, waas_policy_id=policyID, limit=100)
-
-        result = []
-
-        for rule in rules_list.data:
-            result.append(
-                {
-                    "key" : rule.key,
-                    "name": rule.name,
-                    "mod_security_rule_ids" : ' , '.join(map(str,rule.mod_security_rule_ids)),
-                    "recommended_action" : rule.recommended_action,
-                    "description" : rule.description,
-                    "labels" : ' , '.join(map(str,rule.labels))
-                    
-                }
-            )
 
-        return result
+        return list(self.streamFirewallPolicyRecommendations(policyID,
+                                                             cfgName=cfgName))
 
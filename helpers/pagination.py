@@ -0,0 +1,51 @@
+#########################################################################################
+# Filename    : pagination.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Lazy OCI paginator that prefetches the next page in the background
+#########################################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def iterPages(listFunc, *args, prefetch=True, **kwargs):
+    """
+    Yields every response of a paginated OCI list call. With prefetch the request
+    for page N+1 is in flight while the caller processes page N, and at most two
+    pages are held in memory.
+    """
+
+    def fetch(page):
+        if page is None:
+            return listFunc(*args, **kwargs)
+        return listFunc(*args, page=page, **kwargs)
+
+    if not prefetch:
+        page = None
+        while True:
+            response = fetch(page)
+            yield response
+            if not response.has_next_page:
+                return
+            page = response.next_page
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        response = fetch(None)
+        while True:
+            pending = None
+            if response.has_next_page:
+                pending = pool.submit(fetch, response.next_page)
+
+            yield response
+
+            if pending is None:
+                return
+            response = pending.result()
+
+
+def iterRecords(listFunc, *args, prefetch=True, **kwargs):
+
+    for response in iterPages(listFunc, *args, prefetch=prefetch, **kwargs):
+        data = response.data
+        # most list calls return a list, a few (search, usage) wrap it in a collection
+        yield from (data if isinstance(data, list) else data.items)
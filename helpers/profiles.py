@@ -0,0 +1,108 @@
+#########################################################################################
+# Filename    : profiles.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Lazy, mtime-cached registry of profiles in an OCI config file
+#########################################################################################
+
+import os
+import threading
+from collections.abc import Mapping
+
+# absolute path -> (mtime_ns, {profile: {key: value}})
+_parsedFiles = {}
+_parseLock = threading.Lock()
+
+
+def parseConfigFile(path):
+    path = os.path.abspath(os.path.expanduser(path))
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = _parsedFiles.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _parseLock:
+        cached = _parsedFiles.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        sections = {}
+        current = None
+        with open(path, "r") as cfgFile:
+            for line in cfgFile:
+                line = line.strip()
+                if not line or line[0] in "#;":
+                    continue
+                if line.startswith("[") and line.endswith("]"):
+                    current = sections.setdefault(line[1:-1].strip(), {})
+                elif current is not None and "=" in line:
+                    key, value = line.split("=", 1)
+                    current[key.strip()] = value.strip()
+
+        _parsedFiles[path] = (mtime, sections)
+        return sections
+
+
+def profileNames(path):
+    return list(parseConfigFile(path))
+
+
+class ProfileRegistry(Mapping):
+    """
+    Read-only mapping of profile name -> validated OCI config dict. The file is
+    parsed once per mtime and each profile is only validated when first used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._loaded = {}
+        self._sections = None
+        self._lock = threading.Lock()
+
+    def _currentSections(self):
+        sections = parseConfigFile(self.path)
+        if sections is not self._sections:
+            # file changed on disk, drop profiles built from the old contents
+            with self._lock:
+                self._sections = sections
+                self._loaded = {}
+        return sections
+
+    def __getitem__(self, name):
+        sections = self._currentSections()
+        cfg = self._loaded.get(name)
+        if cfg is None:
+            if name not in sections:
+                raise KeyError(name)
+            with self._lock:
+                cfg = self._loaded.get(name)
+                if cfg is None:
+                    cfg = self._load(sections, name)
+                    self._loaded[name] = cfg
+        return cfg
+
+    def __iter__(self):
+        return iter(self._currentSections())
+
+    def __len__(self):
+        return len(self._currentSections())
+
+    def __contains__(self, name):
+        return name in self._currentSections()
+
+    def _load(self, sections, name):
+        # Same merge rules as oci.config.from_file: SDK defaults, then the
+        # DEFAULT section, then the profile itself.
+        from oci.config import DEFAULT_CONFIG, validate_config
+
+        cfg = dict(DEFAULT_CONFIG)
+        if name != "DEFAULT":
+            cfg.update(sections.get("DEFAULT", {}))
+        cfg.update(sections[name])
+
+        if "key_file" in cfg:
+            cfg["key_file"] = os.path.expanduser(cfg["key_file"])
+
+        validate_config(cfg)
+        return cfg
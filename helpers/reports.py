@@ -0,0 +1,200 @@
+#########################################################################################
+# Filename    : reports.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Streaming report writer (CSV, CSV.gz, JSONL, Parquet) for Reports/
+#########################################################################################
+
+import csv
+import datetime
+import gzip
+import json
+import os
+from collections import namedtuple
+
+REPORTS_DIR = "Reports"
+
+# picked up by the scripts so a run can switch format without code changes
+DEFAULT_REPORT_FORMAT = os.environ.get("OCISDK_REPORT_FORMAT", "csv")
+
+REPORT_EXTENSIONS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "jsonl": ".jsonl",
+    "parquet": ".parquet",
+}
+
+# rows buffered per Parquet row group; the other formats write row by row
+PARQUET_BATCH_ROWS = 10000
+
+# type is one of "string", "int", "float", "bool", "timestamp"
+Column = namedtuple("Column", ["name", "type"])
+
+
+class ReportSchema:
+    """The fixed, ordered columns of one report."""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = [Column(*c) for c in columns]
+
+    @property
+    def header(self):
+        return [c.name for c in self.columns]
+
+
+def reportPath(name, fmt=DEFAULT_REPORT_FORMAT, directory=REPORTS_DIR):
+    if fmt not in REPORT_EXTENSIONS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    return os.path.join(directory, name + REPORT_EXTENSIONS[fmt])
+
+
+def formatFromPath(path):
+    for fmt, ext in sorted(REPORT_EXTENSIONS.items(), key=lambda i: -len(i[1])):
+        if path.endswith(ext):
+            return fmt
+    raise ValueError(f"Cannot tell the report format of {path}")
+
+
+def _textValue(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+class _CsvSink:
+
+    def __init__(self, path, schema, compress):
+        self.file = gzip.open(path, "wt", newline="") if compress \
+            else open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(schema.header)
+
+    def write(self, row):
+        self.writer.writerow([_textValue(v) for v in row])
+
+    def close(self):
+        self.file.close()
+
+
+class _JsonlSink:
+
+    def __init__(self, path, schema):
+        self.file = open(path, "w")
+        self.header = schema.header
+
+    def write(self, row):
+        record = dict(zip(self.header, (_textValue(v) for v in row)))
+        self.file.write(json.dumps(record, default=str) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSink:
+
+    def __init__(self, path, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {"string": pa.string(), "int": pa.int64(), "float": pa.float64(),
+                 "bool": pa.bool_(), "timestamp": pa.timestamp("us", tz="UTC")}
+        self.pa = pa
+        self.schema = pa.schema([(c.name, types[c.type]) for c in schema.columns])
+        self.types = [c.type for c in schema.columns]
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.batch = []
+
+    def write(self, row):
+        self.batch.append(row)
+        if len(self.batch) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+
+        columns = []
+        for i, columnType in enumerate(self.types):
+            values = [row[i] for row in self.batch]
+            if columnType == "string":
+                values = [None if v is None else str(_textValue(v)) for v in values]
+            elif columnType == "timestamp":
+                # rows read back from JSON (e.g. snapshots) carry ISO strings
+                values = [datetime.datetime.fromisoformat(v) if isinstance(v, str) else v
+                          for v in values]
+            columns.append(values)
+
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+        self.batch = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class ReportWriter:
+    """
+    Writes rows of a fixed schema as they are produced, into a temporary file
+    next to `path` that replaces `path` only once the report is complete. Use as
+    a context manager; an exception leaves any previous report untouched.
+    """
+
+    def __init__(self, path, schema, fmt=None):
+        self.path = path
+        self.schema = schema
+        self.format = fmt or formatFromPath(path)
+        self.rowCount = 0
+        self._tmpPath = None
+        self._sink = None
+
+    def open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._tmpPath = os.path.join(directory,
+                                     f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+
+        if self.format in ("csv", "csv.gz"):
+            self._sink = _CsvSink(self._tmpPath, self.schema, self.format == "csv.gz")
+        elif self.format == "jsonl":
+            self._sink = _JsonlSink(self._tmpPath, self.schema)
+        elif self.format == "parquet":
+            self._sink = _ParquetSink(self._tmpPath, self.schema)
+        else:
+            raise ValueError(f"Unknown report format: {self.format}")
+        return self
+
+    def write(self, row):
+        if len(row) != len(self.schema.columns):
+            raise ValueError(f"{self.schema.name} rows have {len(self.schema.columns)} "
+                             f"columns, got {len(row)}")
+        self._sink.write(row)
+        self.rowCount += 1
+
+    def writeMany(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def close(self):
+        self._sink.close()
+        os.replace(self._tmpPath, self.path)
+
+    def abort(self):
+        try:
+            self._sink.close()
+        finally:
+            os.remove(self._tmpPath)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, excType, *exc):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def openReport(schema, name=None, fmt=DEFAULT_REPORT_FORMAT, directory=REPORTS_DIR):
+    # Reports/<name or schema name>.<ext for fmt>
+    return ReportWriter(reportPath(name or schema.name, fmt, directory), schema, fmt)
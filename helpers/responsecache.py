@@ -0,0 +1,309 @@
+#########################################################################################
+# Filename    : responsecache.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Persistent TTL / LRU cache of read-only OCI responses, shared across runs
+#########################################################################################
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ocisdk",
+                                  "responses.sqlite")
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_CACHE_TTL = 300
+
+# scripts turn the cache on when this is set
+CACHE_ENABLED = os.environ.get("OCISDK_CACHE", "") not in ("", "0")
+
+# First resource noun found in the operation name -> seconds a response stays
+# fresh. Slow-moving structure is kept long, anything with a lifecycle short.
+CACHE_TTLS = {
+    "availability_domain": 86400,
+    "compartment": 3600,
+    "summarized_usage": 3600,
+    "user": 900,
+    "group": 900,
+    "api_key": 900,
+    "polic": 900,
+    "budget": 900,
+    "alert_rule": 900,
+    "vnic": 600,
+    "cluster": 600,
+    "waas": 600,
+    "volume": 120,
+    "instance": 60,
+    "resources": 60,
+}
+
+# only these operations are read-only and cacheable; everything else passes through
+CACHED_PREFIXES = ("list_", "get_", "search_", "request_summarized_")
+
+# per-call options that don't change the answer
+IGNORED_KWARGS = ("retry_strategy", "opc_request_id")
+
+# kwargs that pick a page of a listing rather than the listing itself
+PAGE_KWARGS = ("page",)
+
+
+def ttlFor(operation, ttls=CACHE_TTLS, default=DEFAULT_CACHE_TTL):
+    for noun, ttl in ttls.items():
+        if noun in operation:
+            return ttl
+    return default
+
+
+class CachedResponse:
+    """The parts of an oci.response.Response the callers use."""
+
+    def __init__(self, status, headers, data, next_page):
+        self.status = status
+        self.headers = headers
+        self.data = data
+        self.next_page = next_page
+
+    @property
+    def has_next_page(self):
+        return self.next_page is not None
+
+
+def _dataType(data):
+    # SDK type name for deserialize_response_data; None for plain JSON values
+    if isinstance(data, list):
+        return f"list[{type(data[0]).__name__}]" if data and \
+            hasattr(data[0], "attribute_map") else None
+    return type(data).__name__ if hasattr(data, "attribute_map") else None
+
+
+def encodeResponse(baseClient, response):
+    """JSON text of a response, its data in the SDK's own wire form."""
+
+    return json.dumps({
+        "status": response.status,
+        "headers": dict(response.headers or {}),
+        "next_page": response.next_page,
+        "type": _dataType(response.data),
+        "data": baseClient.sanitize_for_serialization(response.data),
+    })
+
+
+def decodeResponse(baseClient, value):
+    # models are rebuilt by the client's deserializer, never by unpickling
+    entry = json.loads(value)
+    data = entry["data"]
+    if entry["type"] is not None:
+        data = baseClient.deserialize_response_data(json.dumps(data).encode(),
+                                                     entry["type"])
+    return CachedResponse(entry["status"], entry["headers"], data, entry["next_page"])
+
+
+class ResponseCache:
+    """
+    Responses keyed by (profile, region, service, operation, arguments) in one
+    SQLite file as JSON, each with a TTL from CACHE_TTLS. The pages of one
+    listing form a unit: they share the first page's expiry, a fresh first
+    page replaces them all, and eviction (least recently used first, once the
+    stored size passes maxBytes) drops whole listings. Counts hits and misses
+    per operation.
+    """
+
+    def __init__(self,
+                 path=DEFAULT_CACHE_PATH,
+                 maxBytes=DEFAULT_CACHE_MAX_BYTES,
+                 ttls=None,
+                 defaultTtl=DEFAULT_CACHE_TTL):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.defaultTtl = defaultTtl
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+
+        # files from before listings were tracked hold pickled values; drop them
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(responses)")]
+        if columns and "listing" not in columns:
+            self._db.execute("DROP TABLE responses")
+
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key        TEXT PRIMARY KEY,
+                listing    TEXT NOT NULL,
+                profile    TEXT NOT NULL,
+                service    TEXT NOT NULL,
+                operation  TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used  REAL NOT NULL,
+                size       INTEGER NOT NULL,
+                value      TEXT NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_listing "
+                         "ON responses (listing)")
+        self._db.commit()
+        self._bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def _hash(*parts):
+        # SDK models repr as their attribute dict, so request details hash stably
+        raw = json.dumps(list(parts), sort_keys=True, default=repr)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @classmethod
+    def key(cls, profile, region, service, operation, args, kwargs):
+        """Returns (response key, listing key); they are equal for a first page."""
+
+        kwargs = {k: v for k, v in kwargs.items() if k not in IGNORED_KWARGS}
+        listingKwargs = {k: v for k, v in kwargs.items() if k not in PAGE_KWARGS}
+        return (cls._hash(profile, region, service, operation, list(args), kwargs),
+                cls._hash(profile, region, service, operation, list(args), listingKwargs))
+
+    def get(self, key, listing, operation):
+        # the raw JSON of a fresh response, or None
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now)).fetchone()
+            if row is None:
+                self.misses[operation] += 1
+                return None
+
+            self.hits[operation] += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE listing = ?",
+                             (now, listing))
+            self._db.commit()
+
+        return row[0]
+
+    def put(self, key, listing, profile, service, operation, value):
+        now = time.time()
+
+        with self._lock:
+            if key == listing:
+                # a fresh first page starts the listing over
+                self._deleteListing(listing)
+                expiresAt = now + ttlFor(operation, self.ttls, self.defaultTtl)
+            else:
+                # later pages live exactly as long as the first one; without
+                # it they are not cached at all
+                head = self._db.execute(
+                    "SELECT expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                    (listing, now)).fetchone()
+                if head is None:
+                    return
+                expiresAt = head[0]
+
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?",
+                                   (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, listing, profile, service, operation, expiresAt, now,
+                 len(value), value))
+            self._bytes += len(value) - (old[0] if old else 0)
+
+            if self._bytes > self.maxBytes:
+                self._evict()
+            self._db.commit()
+
+    def _deleteListing(self, listing):
+        size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses "
+                                "WHERE listing = ?", (listing,)).fetchone()[0]
+        self._db.execute("DELETE FROM responses WHERE listing = ?", (listing,))
+        self._bytes -= size
+
+    def _evict(self):
+        # expired entries first, then least recently used listings (all their
+        # pages at once) down to 90% of the bound
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+        target = self.maxBytes * 0.9
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        cur = self._db.execute("SELECT listing, SUM(size) FROM responses "
+                               "GROUP BY listing ORDER BY MAX(last_used)")
+
+        doomed = []
+        for listing, size in cur:
+            if total <= target:
+                break
+            doomed.append((listing,))
+            total -= size
+
+        self._db.executemany("DELETE FROM responses WHERE listing = ?", doomed)
+        self._bytes = total
+
+    def invalidate(self, profile=None, service=None):
+        """Drops every entry of `profile` / `service` (None matches all)."""
+
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM responses WHERE (? IS NULL OR profile = ?) "
+                "AND (? IS NULL OR service = ?)", (profile, profile, service, service))
+            self._db.commit()
+            self._bytes = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "entries": entries,
+            "bytes": self._bytes,
+            "hits_by_operation": dict(self.hits),
+            "misses_by_operation": dict(self.misses),
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachingClient:
+    """
+    Wraps an OCI client: read-only operations (CACHED_PREFIXES) are answered
+    from the cache when fresh, every other attribute is the client's own.
+    """
+
+    def __init__(self, client, cache, profile, service, region):
+        self._client = client
+        self._cache = cache
+        self._scope = (profile, region, service)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or not name.startswith(CACHED_PREFIXES):
+            return attr
+
+        profile, region, service = self._scope
+        cache = self._cache
+
+        baseClient = self._client.base_client
+
+        @functools.wraps(attr)
+        def cached(*args, **kwargs):
+            key, listing = cache.key(profile, region, service, name, args, kwargs)
+            value = cache.get(key, listing, name)
+            if value is not None:
+                return decodeResponse(baseClient, value)
+
+            response = attr(*args, **kwargs)
+            cache.put(key, listing, profile, service, name,
+                      encodeResponse(baseClient, response))
+            return response
+
+        return cached
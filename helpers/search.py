@@ -0,0 +1,64 @@
+#########################################################################################
+# Filename    : search.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : OCI Resource Search structured query helpers
+#########################################################################################
+
+from .pagination import iterRecords
+
+# largest page the search service hands out
+SEARCH_PAGE_SIZE = 1000
+
+
+def quote(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def tagPredicate(tagKey, tagValues):
+    """
+    Matches any of tagValues under tagKey. "Namespace.Key" is looked up as a
+    defined tag, a bare key as a freeform tag or a defined tag in any namespace.
+    """
+
+    clauses = []
+
+    for value in tagValues:
+        clauses.append(f"(freeformTags.key = {quote(tagKey)} && "
+                       f"freeformTags.value = {quote(value)})")
+        if "." in tagKey:
+            namespace, key = tagKey.split(".", 1)
+            clauses.append(f"(definedTags.namespace = {quote(namespace)} && "
+                           f"definedTags.key = {quote(key)} && "
+                           f"definedTags.value = {quote(value)})")
+        else:
+            clauses.append(f"(definedTags.key = {quote(tagKey)} && "
+                           f"definedTags.value = {quote(value)})")
+
+    return "(" + " || ".join(clauses) + ")"
+
+
+def buildQuery(resourceTypes="all", predicates=()):
+    # resourceTypes is "all" or a list such as ["instance", "volume"]
+    if not isinstance(resourceTypes, str):
+        resourceTypes = ", ".join(resourceTypes)
+
+    query = f"query {resourceTypes} resources"
+    if predicates:
+        query += " where " + " && ".join(predicates)
+
+    return query
+
+
+def searchResources(searchClient, query, tenantId=None):
+
+    from oci.resource_search.models import StructuredSearchDetails
+
+    kwargs = {"tenant_id": tenantId} if tenantId else {}
+
+    return iterRecords(searchClient.search_resources,
+                       StructuredSearchDetails(query=query,
+                                               type="Structured",
+                                               matching_context_type="NONE"),
+                       limit=SEARCH_PAGE_SIZE,
+                       **kwargs)
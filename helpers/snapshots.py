@@ -0,0 +1,206 @@
+#########################################################################################
+# Filename    : snapshots.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Keyed store of the last report snapshot, for incremental runs and deltas
+#########################################################################################
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from .clients import DEFAULT_POOL_SIZE
+from .concurrency import fanOut
+from .reports import DEFAULT_REPORT_FORMAT, REPORTS_DIR, ReportWriter, reportPath
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ocisdk",
+                                     "snapshots.sqlite")
+
+# scripts switch to incremental runs (store + delta files) when this is set
+INCREMENTAL_SNAPSHOTS = os.environ.get("OCISDK_INCREMENTAL", "") not in ("", "0")
+
+# rows are lists of report values; added / changed hold the new rows, removed the
+# last stored ones; unchanged and failed are counts
+SnapshotDelta = namedtuple("SnapshotDelta",
+                           ["added", "changed", "removed", "unchanged", "failed"])
+
+
+def _jsonValue(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def normalizeRow(row):
+    # rows are compared and stored in their JSON form, so a fresh row and the
+    # same row read back from the store are equal
+    return json.loads(json.dumps(list(row), default=_jsonValue))
+
+
+def defaultFingerprint(resource):
+    # the fields the list APIs expose that move whenever a resource is
+    # recreated, changes state or (where there is an ETag) is updated at all
+    return "|".join(str(getattr(resource, field, None))
+                    for field in ("time_created", "lifecycle_state", "etag"))
+
+
+class SnapshotStore:
+    """
+    Last snapshot of each report scope: snapshot_rows(scope, key) -> (fingerprint,
+    row). A scope is a report name plus whatever it was taken over (tenancy,
+    compartment), so different runs never overwrite each other.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_rows (
+                scope       TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                row         TEXT NOT NULL,
+                PRIMARY KEY (scope, key)
+            )""")
+        self._db.commit()
+
+    def fingerprints(self, scope):
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT key, fingerprint FROM snapshot_rows WHERE scope = ?", (scope,)))
+
+    def rows(self, scope, keys):
+        """Returns {key: row} for the stored keys among `keys`."""
+
+        result = {}
+        keys = list(keys)
+
+        with self._lock:
+            # stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                cur = self._db.execute(
+                    f"SELECT key, row FROM snapshot_rows WHERE scope = ? AND key IN "
+                    f"({', '.join('?' * len(chunk))})", [scope] + chunk)
+                result.update((key, json.loads(row)) for key, row in cur)
+
+        return result
+
+    def iterRows(self, scope):
+        # every stored row of the scope in key order, read in batches
+        with self._lock:
+            cur = self._db.execute(
+                "SELECT row FROM snapshot_rows WHERE scope = ? ORDER BY key", (scope,))
+            batches = iter(lambda: cur.fetchmany(1000), [])
+
+        for batch in batches:
+            for (row,) in batch:
+                yield json.loads(row)
+
+    def apply(self, scope, upserts, removedKeys):
+        # upserts: {key: (fingerprint, row)}
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO snapshot_rows VALUES (?, ?, ?, ?)",
+                [(scope, key, fingerprint, json.dumps(row))
+                 for key, (fingerprint, row) in upserts.items()])
+            self._db.executemany(
+                "DELETE FROM snapshot_rows WHERE scope = ? AND key = ?",
+                [(scope, key) for key in removedKeys])
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def takeSnapshot(store,
+                 scope,
+                 resources,
+                 key,
+                 fetchRow,
+                 fingerprint=defaultFingerprint,
+                 workers=DEFAULT_POOL_SIZE):
+    """
+    Compares a cheap listing (`resources`) with the stored snapshot of `scope`
+    and calls fetchRow(resource) only for resources that are new or whose
+    fingerprint moved, concurrently. The store is updated and the delta
+    returned. Resources whose fetchRow failed keep their stored row and are
+    counted in failed, not unchanged.
+
+    The listing must be complete: anything it doesn't mention is recorded as
+    removed.
+    """
+
+    previous = store.fingerprints(scope)
+    seen = set()
+    pending = []
+
+    for resource in resources:
+        resourceKey = str(key(resource))
+        seen.add(resourceKey)
+        resourceFingerprint = fingerprint(resource)
+        if previous.get(resourceKey) != resourceFingerprint:
+            pending.append((resourceKey, resourceFingerprint, resource))
+
+    upserts = {}
+    failed = 0
+    for res in fanOut(lambda item: normalizeRow(fetchRow(item[2])), pending, workers):
+        if res.error is not None:
+            # keep the stored row; the resource is looked at again next run
+            log.warning("error fetching %s: %s", res.key[0], res.error)
+            failed += 1
+            continue
+        upserts[res.key[0]] = (res.key[1], res.result)
+
+    stored = store.rows(scope, [k for k in upserts if k in previous])
+    added = [row for k, (_, row) in upserts.items() if k not in previous]
+    changed = [row for k, (_, row) in upserts.items()
+               if k in previous and stored.get(k) != row]
+
+    removedKeys = set(previous) - seen
+    removed = list(store.rows(scope, removedKeys).values())
+
+    store.apply(scope, upserts, removedKeys)
+
+    return SnapshotDelta(added, changed, removed,
+                         len(seen) - len(added) - len(changed) - failed, failed)
+
+
+def writeSnapshotReports(store,
+                         scope,
+                         schema,
+                         delta,
+                         name=None,
+                         fmt=DEFAULT_REPORT_FORMAT,
+                         directory=REPORTS_DIR):
+    """
+    Writes the full view of `scope` from the store as Reports/<name>.<ext>, plus
+    <name>.added / .changed / .removed files holding just the delta. Returns
+    the paths written, full view first.
+    """
+
+    name = name or schema.name
+    paths = []
+
+    with ReportWriter(reportPath(name, fmt, directory), schema, fmt) as report:
+        report.writeMany(store.iterRows(scope))
+    paths.append(report.path)
+
+    for kind in ("added", "changed", "removed"):
+        with ReportWriter(reportPath(f"{name}.{kind}", fmt, directory), schema, fmt) as report:
+            report.writeMany(getattr(delta, kind))
+        paths.append(report.path)
+
+    return paths
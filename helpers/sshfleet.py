@@ -0,0 +1,217 @@
+#########################################################################################
+# Filename    : sshfleet.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Runs commands / scripts on many hosts over reused SSH connections
+#########################################################################################
+
+import os
+import select
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from .concurrency import fanOut
+
+DEFAULT_SSH_PARALLELISM = 16
+READ_SIZE = 32768
+
+# saves the script arriving on stdin to a temporary file, executes it (so its
+# shebang applies), removes it and exits with the script's status
+RUN_PIPED_SCRIPT = ('f=$(mktemp) && cat > "$f" && chmod +x "$f" && "$f" </dev/null; '
+                    'rc=$?; rm -f "$f"; exit $rc')
+
+# exit_code is None when the host failed (connect error, timeout); error says why
+HostResult = namedtuple("HostResult", ["host", "exit_code", "error", "elapsed"])
+
+_printLock = threading.Lock()
+
+
+def loadKey(keyFile, passphrase=None):
+    # decrypting the key is the slow part of an SSH login: do it once per fleet
+    import paramiko
+
+    return paramiko.RSAKey.from_private_key_file(os.path.expanduser(keyFile),
+                                                 password=passphrase)
+
+
+def printLine(host, stream, line):
+    with _printLock:
+        print(f"[{host}] {line}", file=sys.stderr if stream == "stderr" else sys.stdout,
+              flush=True)
+
+
+def splitHost(host, defaultPort=22):
+    # "10.0.0.5" or "10.0.0.5:2222"
+    name, _, port = host.rpartition(":")
+    if name and port.isdigit():
+        return name, int(port)
+    return host, defaultPort
+
+
+class SSHFleet:
+    """
+    One decrypted key, one SSH connection per host kept open across commands,
+    and at most `parallelism` hosts worked on at once. Output is handed to
+    onLine(host, stream, line) as each line arrives.
+    """
+
+    def __init__(self,
+                 user,
+                 keyFile=None,
+                 passphrase=None,
+                 key=None,
+                 port=22,
+                 parallelism=DEFAULT_SSH_PARALLELISM,
+                 connectTimeout=15,
+                 hostTimeout=600,
+                 hostKeyPolicy=None,
+                 onLine=printLine):
+        self.user = user
+        self.key = key or loadKey(keyFile, passphrase)
+        self.port = port
+        self.parallelism = parallelism
+        self.connectTimeout = connectTimeout
+        self.hostTimeout = hostTimeout
+        self.hostKeyPolicy = hostKeyPolicy
+        self.onLine = onLine
+        self._clients = {}
+        self._hostLocks = {}
+        self._lock = threading.Lock()
+
+    def _hostLock(self, host):
+        with self._lock:
+            return self._hostLocks.setdefault(host, threading.Lock())
+
+    def client(self, host):
+        import paramiko
+
+        with self._hostLock(host):
+            client = self._clients.get(host)
+            transport = client.get_transport() if client is not None else None
+            if transport is not None and transport.is_active():
+                return client
+
+            hostname, port = splitHost(host, self.port)
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(self.hostKeyPolicy or paramiko.AutoAddPolicy())
+            client.connect(hostname, port=port, username=self.user, pkey=self.key,
+                           timeout=self.connectTimeout,
+                           banner_timeout=self.connectTimeout,
+                           auth_timeout=self.connectTimeout,
+                           allow_agent=False, look_for_keys=False)
+            self._clients[host] = client
+            return client
+
+    def execute(self, host, command, stdin=None, timeout=None):
+        """
+        Runs one command on the host's shared connection and returns its exit
+        code. Raises TimeoutError (after closing the channel) past `timeout`.
+        """
+
+        timeout = self.hostTimeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        channel = self.client(host).get_transport().open_session(timeout=self.connectTimeout)
+
+        try:
+            channel.exec_command(command)
+            if stdin is not None:
+                channel.sendall(stdin.encode() if isinstance(stdin, str) else stdin)
+            channel.shutdown_write()
+
+            partial = {"stdout": b"", "stderr": b""}
+
+            def feed(stream, data):
+                lines = (partial[stream] + data).split(b"\n")
+                partial[stream] = lines.pop()
+                for line in lines:
+                    self.onLine(host, stream, line.decode(errors="replace").rstrip("\r"))
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{command!r} still running after {timeout:.0f}s")
+
+                # the channel's fileno becomes readable on stdout or stderr data
+                select.select([channel], [], [], min(remaining, 1.0))
+
+                while channel.recv_ready():
+                    feed("stdout", channel.recv(READ_SIZE))
+                while channel.recv_stderr_ready():
+                    feed("stderr", channel.recv_stderr(READ_SIZE))
+
+                if channel.exit_status_ready() and not channel.recv_ready() \
+                        and not channel.recv_stderr_ready():
+                    break
+
+            for stream, rest in partial.items():
+                if rest:
+                    self.onLine(host, stream, rest.decode(errors="replace").rstrip("\r"))
+
+            return channel.recv_exit_status()
+        finally:
+            channel.close()
+
+    def runOnHost(self, host, commands, stdin=None):
+        # commands run in order on one connection, stopping at the first failure;
+        # the whole sequence shares the host timeout and each gets the same stdin
+        start = time.monotonic()
+        deadline = start + self.hostTimeout
+        exitCode = None
+
+        try:
+            for command in commands:
+                exitCode = self.execute(host, command, stdin=stdin,
+                                        timeout=deadline - time.monotonic())
+                if exitCode != 0:
+                    break
+        except Exception as e:
+            self.disconnect(host)
+            return HostResult(host, None, f"{type(e).__name__}: {e}",
+                              time.monotonic() - start)
+
+        return HostResult(host, exitCode, None, time.monotonic() - start)
+
+    def run(self, hosts, commands, stdin=None):
+        """Yields a HostResult per host, in completion order."""
+
+        if isinstance(commands, str):
+            commands = [commands]
+
+        for res in fanOut(lambda host: self.runOnHost(host, commands, stdin),
+                          list(dict.fromkeys(hosts)), self.parallelism):
+            yield res.result if res.error is None else \
+                HostResult(res.key, None, str(res.error), None)
+
+    def runScript(self, hosts, scriptPath, interpreter=None):
+        """
+        Runs a local script on every host. It is read once and piped over the
+        exec channel, so no SFTP session is needed. By default the host saves
+        it to a temporary file and executes that, so its shebang picks the
+        interpreter as before; with `interpreter` (e.g. "bash -s") it is fed
+        straight to that command's stdin instead.
+        """
+
+        with open(scriptPath, "rb") as f:
+            script = f.read()
+
+        return self.run(hosts, interpreter or RUN_PIPED_SCRIPT, stdin=script)
+
+    def disconnect(self, host):
+        with self._lock:
+            client = self._clients.pop(host, None)
+        if client is not None:
+            client.close()
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
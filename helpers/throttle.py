@@ -0,0 +1,281 @@
+#########################################################################################
+# Filename    : throttle.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Process-wide AIMD concurrency and throttle-aware retries for OCI calls
+#########################################################################################
+
+import functools
+import random
+import threading
+import time
+from collections import deque
+
+# per-service in-flight limit: starting point and bounds
+INITIAL_LIMIT = 8
+MIN_LIMIT = 1
+MAX_LIMIT = 64
+
+# The limit grows at most once per window (+1 after a window of successes) and
+# halves at most once per window after a 429 / 5xx. One burst of rejections is
+# then a single congestion signal, and a fast service can't ramp the limit up
+# faster than its rate limiter refills.
+ADJUST_INTERVAL = 0.5
+
+# Services limit requests per second, which an in-flight bound alone can't
+# enforce when round trips are short. After the first 429 calls are also paced:
+# the rate drops to a fraction of what was achieved, then climbs by a fixed
+# step (a share of the rate at the last drop) per good window.
+RATE_DECREASE = 0.75
+RATE_WINDOW = 1.0
+RATE_STEP = 0.05
+MIN_RATE = 1.0
+
+# full-jitter exponential backoff between attempts of one call
+MAX_ATTEMPTS = 8
+BASE_BACKOFF = 0.25
+MAX_BACKOFF = 30.0
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# 409s the SDK's default strategy retries: the resource is busy, not in conflict
+RETRYABLE_CONFLICT_CODES = ("IncorrectState", "LockConflict")
+
+# Operations safe to send twice. Anything else (create_*, instance_action, ...)
+# is only replayed with an opc_retry_token, or when the service can't have
+# acted on it: a 429 or a connection that was never established.
+IDEMPOTENT_PREFIXES = ("get_", "list_", "search_", "request_summarized_", "summarize_",
+                       "update_", "delete_", "head_")
+
+
+class AdaptiveLimit:
+    """
+    Additive-increase / multiplicative-decrease bounds on the requests in flight
+    to one service and, once it has throttled, on their rate. A Retry-After
+    pauses every caller of the service, not just the one that received it.
+    """
+
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.inFlight = 0
+        self.pausedUntil = 0.0
+        self.rate = None
+        self._rateStep = 0.0
+        self._nextSlot = 0.0
+        self._created = self._lastAdjust = time.monotonic()
+        self._lastDecrease = 0.0
+        self._successes = 0
+        self._recent = deque()
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self.pausedUntil, self._nextSlot if self.rate else 0) - now
+                if wait <= 0 and self.inFlight < int(self.limit):
+                    self.inFlight += 1
+                    if self.rate:
+                        self._nextSlot = max(self._nextSlot, now) + 1 / self.rate
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, throttled=False, retryAfter=None):
+        with self._cond:
+            self.inFlight -= 1
+            now = time.monotonic()
+
+            # success times over the last RATE_WINDOW, to know the achieved rate
+            while self._recent and self._recent[0] < now - RATE_WINDOW:
+                self._recent.popleft()
+
+            if not throttled:
+                self._successes += 1
+                self._recent.append(now)
+                if now - self._lastAdjust >= ADJUST_INTERVAL and \
+                        self._successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    if self.rate:
+                        self.rate += self._rateStep
+                    self._lastAdjust = now
+                    self._successes = 0
+            elif now - self._lastDecrease >= ADJUST_INTERVAL:
+                achieved = len(self._recent) / min(RATE_WINDOW,
+                                                   max(now - self._created, 1e-3))
+                self.rate = max(MIN_RATE, RATE_DECREASE * achieved)
+                self._rateStep = max(RATE_STEP * self.rate, RATE_STEP)
+                self.limit = max(self.minimum, self.limit / 2)
+                self._lastAdjust = self._lastDecrease = now
+                self._successes = 0
+
+                # the service asked everyone to hold off, not just this caller
+                if retryAfter:
+                    self.pausedUntil = max(self.pausedUntil, now + retryAfter)
+
+            self._cond.notify_all()
+
+
+def _retryAfter(error):
+    # seconds from a Retry-After header; HTTP dates are rare enough to ignore
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ThrottleController:
+    """
+    Runs every call through the AdaptiveLimit of its service and retries what
+    the SDK's default strategy would (429, 5xx, busy 409s, connection errors
+    and timeouts) with jittered exponential backoff, never shorter than the
+    Retry-After the service asked for. Non-idempotent operations without an
+    opc_retry_token are only retried when the service can't have acted on
+    them. Keeps per-service counters.
+    """
+
+    def __init__(self,
+                 initialLimit=INITIAL_LIMIT,
+                 maxLimit=MAX_LIMIT,
+                 maxAttempts=MAX_ATTEMPTS,
+                 baseBackoff=BASE_BACKOFF,
+                 maxBackoff=MAX_BACKOFF):
+        self.initialLimit = initialLimit
+        self.maxLimit = maxLimit
+        self.maxAttempts = maxAttempts
+        self.baseBackoff = baseBackoff
+        self.maxBackoff = maxBackoff
+        self.limits = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _service(self, service):
+        with self._lock:
+            if service not in self.limits:
+                self.limits[service] = AdaptiveLimit(self.initialLimit,
+                                                     maximum=self.maxLimit)
+                self.counters[service] = {"calls": 0, "retries": 0,
+                                          "throttled": 0, "failed": 0}
+            return self.limits[service], self.counters[service]
+
+    def _count(self, counters, name):
+        with self._lock:
+            counters[name] += 1
+
+    def backoff(self, attempt, retryAfter=None):
+        delay = random.uniform(0, min(self.maxBackoff, self.baseBackoff * 2 ** attempt))
+        return max(delay, retryAfter or 0.0)
+
+    @staticmethod
+    def retryable(error, replayable):
+        """Whether a failed attempt may be sent again."""
+        from oci.exceptions import ConnectTimeout, RequestException, ServiceError
+
+        if isinstance(error, ServiceError):
+            if error.status == 429:
+                return True
+            if not replayable:
+                return False
+            return error.status in RETRYABLE_STATUSES or \
+                (error.status == 409 and error.code in RETRYABLE_CONFLICT_CODES)
+
+        # transport failures: connection errors, read timeouts
+        if isinstance(error, ConnectTimeout):
+            return True
+        return replayable and isinstance(error, (RequestException, ConnectionError))
+
+    def call(self, service, func, *args, **kwargs):
+        from oci.exceptions import ServiceError
+
+        limit, counters = self._service(service)
+        self._count(counters, "calls")
+        retries = throttled = 0
+        replayable = getattr(func, "__name__", "").startswith(IDEMPOTENT_PREFIXES) or \
+            bool(kwargs.get("opc_retry_token"))
+
+        try:
+            for attempt in range(self.maxAttempts):
+                limit.acquire()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    retryable = self.retryable(e, replayable)
+                    isServiceError = isinstance(e, ServiceError)
+                    retryAfter = _retryAfter(e) if retryable and isServiceError else None
+                    # a 409 is about the resource, not the service's load
+                    limit.release(throttled=retryable and getattr(e, "status", None) != 409,
+                                  retryAfter=retryAfter)
+                    is429 = isServiceError and e.status == 429
+                    throttled += is429
+
+                    if not retryable or attempt == self.maxAttempts - 1:
+                        self._count(counters, "failed")
+                        raise
+
+                    retries += 1
+                    self._count(counters, "throttled" if is429 else "retries")
+                    time.sleep(self.backoff(attempt, retryAfter))
+                    continue
+                except BaseException:
+                    limit.release()
+                    self._count(counters, "failed")
+                    raise
+
+                limit.release()
+                return result
+        finally:
+            self._local.last = (retries, throttled)
+
+    def lastCall(self):
+        # (retries, 429s) of the latest call made by the calling thread
+        return getattr(self._local, "last", (0, 0))
+
+    def stats(self):
+        with self._lock:
+            return {service: dict(self.counters[service],
+                                  limit=round(self.limits[service].limit, 2),
+                                  rate=self.limits[service].rate and
+                                  round(self.limits[service].rate, 1),
+                                  in_flight=self.limits[service].inFlight)
+                    for service in self.limits}
+
+
+class ThrottledClient:
+    """Wraps an OCI client so each of its operations goes through the controller."""
+
+    def __init__(self, client, controller, service):
+        self._client = client
+        self._controller = controller
+        self._service = service
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        controller, service = self._controller, self._service
+
+        @functools.wraps(attr)
+        def throttled(*args, **kwargs):
+            return controller.call(service, attr, *args, **kwargs)
+
+        return throttled
+
+
+_processController = None
+_processLock = threading.Lock()
+
+
+def processController():
+    # the one controller shared by every OCISDK in the process, so concurrent
+    # instances (and scripts) back off together
+    global _processController
+
+    with _processLock:
+        if _processController is None:
+            _processController = ThrottleController()
+        return _processController
@@ -0,0 +1,132 @@
+#########################################################################################
+# Filename    : usagecube.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Columnar usage cube (compartment x service x SKU) and its roll-ups
+#########################################################################################
+
+# the one group_by every usage view is derived from
+CUBE_GROUP_BY = ['compartmentId', 'service', 'skuName']
+
+# deepest compartment level the Usage API will group by
+USAGE_COMPARTMENT_DEPTH = 7
+
+# level the per-compartment daily views report at (top-level compartments)
+REPORT_COMPARTMENT_DEPTH = 1
+
+
+class UsageCube:
+    """
+    Usage rows held as NumPy columns: one datetime64[D] day column, one int32
+    code column per dimension (strings are interned into `labels`) and one
+    float64 amount column. Roll-ups are a single np.unique + np.bincount.
+    """
+
+    def __init__(self, day, codes, labels, amount):
+        self.day = day
+        self.codes = codes
+        self.labels = labels
+        self.amount = amount
+
+    @classmethod
+    def fromRows(cls, rowsByDay, dims=CUBE_GROUP_BY):
+        import numpy as np
+
+        count = sum(len(rows) for rows in rowsByDay.values())
+        day = np.empty(count, dtype="datetime64[D]")
+        amount = np.empty(count, dtype=np.float64)
+        codes = {dim: np.empty(count, dtype=np.int32) for dim in dims}
+        tables = {dim: {} for dim in dims}
+
+        i = 0
+        for d, rows in sorted(rowsByDay.items()):
+            day[i:i + len(rows)] = np.datetime64(d, "D")
+            for row in rows:
+                for dim in dims:
+                    table = tables[dim]
+                    code = table.get(row[dim])
+                    if code is None:
+                        code = table[row[dim]] = len(table)
+                    codes[dim][i] = code
+                amount[i] = row["usage"]
+                i += 1
+
+        # dicts keep insertion order, so list position == code
+        labels = {dim: list(tables[dim]) for dim in dims}
+
+        return cls(day, codes, labels, amount)
+
+    def __len__(self):
+        return len(self.amount)
+
+    @property
+    def nbytes(self):
+        return (self.day.nbytes + self.amount.nbytes +
+                sum(col.nbytes for col in self.codes.values()))
+
+    def total(self):
+        return float(self.amount.sum())
+
+    def compartmentsAtDepth(self, depth, tree):
+        """
+        Re-codes the compartmentId column to each compartment's ancestor at
+        `depth` of a CompartmentTree (the tenancy is depth 0). Compartments the
+        tree doesn't know are kept as they are.
+        """
+        import numpy as np
+
+        labels = []
+        index = {}
+        mapping = np.empty(len(self.labels["compartmentId"]), dtype=np.int32)
+
+        for code, cmpId in enumerate(self.labels["compartmentId"]):
+            ancestor = tree.ancestorAtDepth(cmpId, depth) if cmpId in tree else cmpId
+            if ancestor not in index:
+                index[ancestor] = len(labels)
+                labels.append(ancestor)
+            mapping[code] = index[ancestor]
+
+        return mapping[self.codes["compartmentId"]], labels
+
+    def rollup(self, by, depth=None, tree=None, byDay=False):
+        """
+        Sums amount over every dimension not in `by` and returns
+        {(label, ...): amount} ordered by label code. With depth and a
+        CompartmentTree the compartmentId dimension is rolled up to that level.
+        """
+        import numpy as np
+
+        if depth is not None and tree is None:
+            raise ValueError("rollup to a compartment depth needs the CompartmentTree")
+
+        columns = []
+        if byDay:
+            uniqueDays, dayIndex = np.unique(self.day, return_inverse=True)
+            columns.append((dayIndex.astype(np.int64), [d.item() for d in uniqueDays]))
+
+        for dim in by:
+            if dim == "compartmentId" and depth is not None:
+                col, labels = self.compartmentsAtDepth(depth, tree)
+            else:
+                col, labels = self.codes[dim], self.labels[dim]
+            columns.append((col.astype(np.int64), labels))
+
+        if not len(self):
+            return {}
+
+        combined = np.zeros(len(self), dtype=np.int64)
+        for col, labels in columns:
+            combined = combined * max(len(labels), 1) + col
+
+        keys, inverse = np.unique(combined, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.amount, minlength=len(keys))
+
+        result = {}
+        for key, value in zip(keys.tolist(), sums.tolist()):
+            parts = []
+            for col, labels in reversed(columns):
+                key, code = divmod(key, max(len(labels), 1))
+                parts.append(labels[code])
+            result[tuple(reversed(parts))] = value
+
+        return result
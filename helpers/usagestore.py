@@ -0,0 +1,104 @@
+#########################################################################################
+# Filename    : usagestore.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : On-disk store of daily usage rows, serving settled days without API calls
+#########################################################################################
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ocisdk",
+                                  "usage.sqlite")
+
+# Usage for a day keeps trickling in for a while after it closes; once this many
+# full days have passed since its end it is treated as immutable.
+DEFAULT_SETTLE_DAYS = 3
+
+
+class UsageStore:
+
+    def __init__(self, path=DEFAULT_STORE_PATH, settleDays=DEFAULT_SETTLE_DAYS):
+        self.path = path
+        self.settleDays = settleDays
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS usage_days (
+                tenancy    TEXT NOT NULL,
+                grouping   TEXT NOT NULL,
+                day        TEXT NOT NULL,
+                rows       TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                PRIMARY KEY (tenancy, grouping, day)
+            )""")
+        self._db.commit()
+
+    def settledAt(self, day):
+        # first instant from which a fetch of `day` is final
+        return datetime.datetime.combine(day, datetime.time()) + \
+            datetime.timedelta(days=1 + self.settleDays)
+
+    def load(self, tenancy, grouping, days):
+        """Returns {day: rows} for the days whose stored copy is final."""
+
+        if not days:
+            return {}
+
+        with self._lock:
+            cur = self._db.execute(
+                "SELECT day, rows, fetched_at FROM usage_days "
+                "WHERE tenancy = ? AND grouping = ? AND day BETWEEN ? AND ?",
+                (tenancy, grouping, min(days).isoformat(), max(days).isoformat()))
+            stored = cur.fetchall()
+
+        wanted = set(days)
+        result = {}
+
+        for day, rows, fetchedAt in stored:
+            day = datetime.date.fromisoformat(day)
+            if day in wanted and \
+                    datetime.datetime.fromisoformat(fetchedAt) >= self.settledAt(day):
+                result[day] = json.loads(rows)
+
+        return result
+
+    def save(self, tenancy, grouping, rowsByDay, fetchedAt=None):
+
+        fetchedAt = (fetchedAt or datetime.datetime.utcnow()).isoformat()
+
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO usage_days VALUES (?, ?, ?, ?, ?)",
+                [(tenancy, grouping, day.isoformat(), json.dumps(rows), fetchedAt)
+                 for day, rows in rowsByDay.items()])
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def dayRange(start, end):
+    # [start, end) as dates
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days)]
+
+
+def contiguousRanges(days):
+    # sorted dates -> [(start, endExclusive), ...] so each gap is one request
+    ranges = []
+
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + datetime.timedelta(days=1)
+        else:
+            ranges.append([day, day + datetime.timedelta(days=1)])
+
+    return [tuple(r) for r in ranges]
@@ -1,17 +1,5 @@
-import re
-import os
-import pandas as pd
+from .profiles import profileNames
 
 def getProfilesFromConfig(path):
 
-    pName = []
-
-    cfgFile = open(path, 'r')
-    Lines = cfgFile.readlines()
-
-    for line in Lines:
-        m = re.findall("\[.*\]", line)
-        if len(m) > 0:
-            pName.append(str(m[0]).replace('[', "").replace(']', ""))
-
-    return pName
\ No newline at end of file
+    return profileNames(path)
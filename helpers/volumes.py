@@ -0,0 +1,231 @@
+#########################################################################################
+# Filename    : volumes.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Volume / attachment index joined in memory by volume and instance id
+#########################################################################################
+
+import datetime
+import logging
+
+from .clients import DEFAULT_POOL_SIZE
+from .concurrency import fanOut
+from .pagination import iterRecords
+from .reports import ReportSchema
+
+log = logging.getLogger(__name__)
+
+# attachments in any other state no longer tie the volume to the instance
+LIVE_ATTACHMENT_STATES = ("ATTACHING", "ATTACHED")
+
+
+BLOCK_VOLUME_SCHEMA = ReportSchema("block_volume_details", [
+    ("Display Name", "string"),
+    ("Volume_OCID", "string"),
+    ("Size (in GB)", "int"),
+    ("Lifecycle State", "string"),
+])
+
+
+def blockVolumeRow(vol):
+    # row of BLOCK_VOLUME_SCHEMA for an SDK Volume / BootVolume
+    return [vol.display_name, vol.id, vol.size_in_gbs, vol.lifecycle_state]
+
+
+def volumeToDict(vol, kind):
+    return {
+        "name": vol.display_name,
+        "size_gb": vol.size_in_gbs,
+        "id": vol.id,
+        "state": vol.lifecycle_state,
+        "kind": kind,
+        "compartment_id": vol.compartment_id,
+        "availability_domain": vol.availability_domain,
+        "time_created": vol.time_created,
+    }
+
+
+class VolumeIndex:
+    """
+    Block volumes, boot volumes and their live attachments, hash-joined so a
+    VM's volumes are a dict lookup: volumes[id] and byInstance[id] -> [volume id].
+    """
+
+    def __init__(self):
+        self.volumes = {}
+        self.byInstance = {}
+        self.attachedIds = set()
+
+    def addVolume(self, record):
+        self.volumes[record["id"]] = record
+
+    def addAttachment(self, instanceId, volumeId):
+        self.byInstance.setdefault(instanceId, []).append(volumeId)
+        self.attachedIds.add(volumeId)
+
+    def forInstance(self, instanceId, includeBoot=False):
+        result = []
+
+        for volumeId in self.byInstance.get(instanceId, ()):
+            vol = self.volumes.get(volumeId)
+            if vol is not None and (includeBoot or vol["kind"] == "block"):
+                result.append(vol)
+
+        return result
+
+    def volumeMap(self, includeBoot=True):
+        return {instanceId: self.forInstance(instanceId, includeBoot)
+                for instanceId in self.byInstance}
+
+
+def _listTask(clients, cfgName, task):
+    kind, compartmentID, availabilityDomain = task
+    blockstorage_client = clients.get(cfgName, "blockstorage")
+    compute_client = clients.get(cfgName, "compute")
+
+    if kind == "volumes":
+        return [volumeToDict(v, "block") for v in iterRecords(
+            blockstorage_client.list_volumes, compartment_id=compartmentID)]
+
+    if kind == "boot_volumes":
+        return [volumeToDict(v, "boot") for v in iterRecords(
+            blockstorage_client.list_boot_volumes, compartment_id=compartmentID)]
+
+    if kind == "attachments":
+        return [(a.instance_id, a.volume_id) for a in iterRecords(
+            compute_client.list_volume_attachments, compartment_id=compartmentID)
+            if a.lifecycle_state in LIVE_ATTACHMENT_STATES]
+
+    return [(a.instance_id, a.boot_volume_id) for a in iterRecords(
+        compute_client.list_boot_volume_attachments,
+        availabilityDomain, compartmentID)
+        if a.lifecycle_state in LIVE_ATTACHMENT_STATES]
+
+
+def volumeTasks(compartmentIDs, availabilityDomains, attachmentCompartmentIDs=None):
+    # Attachments live in the instance's compartment, which can differ from the
+    # volume's; they are listed in attachmentCompartmentIDs (default: the same
+    # compartments). Boot volume attachments are the only listing that needs an AD.
+    for compartmentID in compartmentIDs:
+        yield ("volumes", compartmentID, None)
+        yield ("boot_volumes", compartmentID, None)
+
+    for compartmentID in (compartmentIDs if attachmentCompartmentIDs is None
+                          else attachmentCompartmentIDs):
+        yield ("attachments", compartmentID, None)
+        for ad in availabilityDomains:
+            yield ("boot_attachments", compartmentID, ad)
+
+
+def streamVolumeListings(clients, cfgName, compartmentIDs, availabilityDomains,
+                         workers=DEFAULT_POOL_SIZE, attachmentCompartmentIDs=None):
+    # FanOutResult per (kind, compartment, AD) listing, in completion order
+    return fanOut(lambda task: _listTask(clients, cfgName, task),
+                  volumeTasks(compartmentIDs, availabilityDomains,
+                              attachmentCompartmentIDs), workers)
+
+
+def buildVolumeIndex(clients, cfgName, compartmentIDs, availabilityDomains,
+                     workers=DEFAULT_POOL_SIZE, attachmentCompartmentIDs=None):
+
+    # attachmentCompartmentIDs should be the whole tenancy, as for
+    # findUnattachedVolumes: instances anywhere can attach these volumes
+    index = VolumeIndex()
+
+    for res in streamVolumeListings(clients, cfgName, compartmentIDs,
+                                    availabilityDomains, workers,
+                                    attachmentCompartmentIDs):
+        kind, compartmentID, ad = res.key
+        if res.error is not None:
+            log.warning("error listing %s in %s: %s", kind, compartmentID, res.error)
+            continue
+
+        if kind in ("volumes", "boot_volumes"):
+            for record in res.result:
+                index.addVolume(record)
+        else:
+            for instanceId, volumeId in res.result:
+                index.addAttachment(instanceId, volumeId)
+
+    return index
+
+
+UNATTACHED_SCHEMA = ReportSchema("unattached_volumes", [
+    ("Display Name", "string"),
+    ("Volume_OCID", "string"),
+    ("Type", "string"),
+    ("Size (in GB)", "int"),
+    ("Age (days)", "int"),
+    ("Lifecycle State", "string"),
+    ("Compartment OCID", "string"),
+    ("Availability Domain", "string"),
+])
+UNATTACHED_HEADER = UNATTACHED_SCHEMA.header
+
+# volumes on their way out are not orphans worth reporting
+GONE_VOLUME_STATES = ("TERMINATING", "TERMINATED")
+
+
+def findUnattachedVolumes(clients, cfgName, compartmentIDs, availabilityDomains,
+                          workers=DEFAULT_POOL_SIZE, now=None,
+                          attachmentCompartmentIDs=None):
+    """
+    Streams every volume, boot volume and attachment listing concurrently and
+    yields the volumes no live attachment points at, with size and age. Only a
+    tuple per volume and the set of attached ids are kept while listing.
+
+    Attachments are looked up in attachmentCompartmentIDs, which should be the
+    whole tenancy: a volume can be attached to an instance in any compartment.
+    If any attachment listing fails nothing is yielded and RuntimeError is
+    raised, since the volumes it would have covered would look unattached.
+    """
+
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    candidates = []
+    attached = set()
+    failed = []
+
+    for res in streamVolumeListings(clients, cfgName, compartmentIDs,
+                                    availabilityDomains, workers,
+                                    attachmentCompartmentIDs):
+        kind, compartmentID, ad = res.key
+        if res.error is not None:
+            if kind in ("attachments", "boot_attachments"):
+                log.error("error listing %s in %s: %s", kind, compartmentID, res.error)
+                failed.append(res)
+            else:
+                log.warning("error listing %s in %s: %s", kind, compartmentID, res.error)
+            continue
+
+        if kind in ("volumes", "boot_volumes"):
+            candidates.extend(
+                (v["id"], v["name"], v["kind"], v["size_gb"], v["time_created"],
+                 v["state"], v["compartment_id"], v["availability_domain"])
+                for v in res.result if v["state"] not in GONE_VOLUME_STATES)
+        else:
+            attached.update(volumeId for _, volumeId in res.result)
+
+    if failed:
+        kind, compartmentID, ad = failed[0].key
+        raise RuntimeError(f"{len(failed)} attachment listing(s) failed, first {kind} in "
+                           f"{compartmentID}; refusing to report unattached volumes") \
+            from failed[0].error
+
+    for volId, name, kind, size, created, state, cmpId, ad in candidates:
+        if volId in attached:
+            continue
+        yield {
+            "name": name,
+            "id": volId,
+            "kind": kind,
+            "size_gb": size,
+            "age_days": (now - created).days if created is not None else None,
+            "state": state,
+            "compartment_id": cmpId,
+            "availability_domain": ad,
+        }
+
+
+def unattachedRow(vol):
+    return [vol["name"], vol["id"], vol["kind"], vol["size_gb"], vol["age_days"],
+            vol["state"], vol["compartment_id"], vol["availability_domain"]]
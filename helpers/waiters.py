@@ -0,0 +1,81 @@
+#########################################################################################
+# Filename    : waiters.py
+# FileType    : Python Source file
+# Copyrights  : Codegen International
+# description : Single polling loop that follows many resources to a lifecycle state
+#########################################################################################
+
+import time
+
+from .clients import DEFAULT_POOL_SIZE
+from .concurrency import fanOut
+
+TIMED_OUT = "TIMED_OUT"
+
+
+class BatchWaiter:
+    """
+    Follows many resources to a target lifecycle state with one shared polling
+    loop: each round fetches the state of everything still pending (on a bounded
+    pool), then sleeps with exponential backoff. No waiter thread per resource.
+    """
+
+    def __init__(self,
+                 getState,
+                 targetStates,
+                 failedStates=(),
+                 goneState=None,
+                 initialDelay=2.0,
+                 maxDelay=30.0,
+                 backoff=1.5,
+                 timeout=1800,
+                 workers=DEFAULT_POOL_SIZE):
+        # getState(id) -> lifecycle state; a 404 maps to goneState when given
+        self.getState = getState
+        self.targetStates = set(targetStates)
+        self.failedStates = set(failedStates)
+        self.goneState = goneState
+        self.initialDelay = initialDelay
+        self.maxDelay = maxDelay
+        self.backoff = backoff
+        self.timeout = timeout
+        self.workers = workers
+
+    def _poll(self, resourceId):
+        from oci.exceptions import ServiceError
+
+        try:
+            return self.getState(resourceId)
+        except ServiceError as e:
+            if e.status == 404 and self.goneState is not None:
+                return self.goneState
+            raise
+
+    def wait(self, resourceIds, onChange=None):
+        """Returns {id: final state}, TIMED_OUT for anything still pending."""
+
+        pending = set(resourceIds)
+        states = {}
+        delay = self.initialDelay
+        deadline = time.monotonic() + self.timeout
+
+        while pending and time.monotonic() < deadline:
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * self.backoff, self.maxDelay)
+
+            for res in fanOut(self._poll, list(pending), self.workers):
+                if res.error is not None:
+                    # transient errors just mean "ask again next round"
+                    continue
+
+                if states.get(res.key) != res.result and onChange is not None:
+                    onChange(res.key, res.result)
+                states[res.key] = res.result
+
+                if res.result in self.targetStates or res.result in self.failedStates:
+                    pending.discard(res.key)
+
+        for resourceId in pending:
+            states[resourceId] = TIMED_OUT
+
+        return states
@@ -1,88 +1,138 @@
-import oci
-import sys
+import argparse
+import getpass
 import os
-import paramiko
+import sys
+from helpers.addresses import AddressCache
 from helpers.ocisdk import OCISDK
+from helpers.sshfleet import DEFAULT_SSH_PARALLELISM, SSHFleet
 from helpers.utils import getProfilesFromConfig
 
-ocisdk = OCISDK()
-
 # ==============================================
-# =============== Select Profile ===============
+# ========= Run a script on OCI instances ======
 # ==============================================
-SELECTED_PROFILE = ""
 
-# Set your root compartment ID (this should be the tenancy OCID)
-TENANCY_OCID = 'ocid1.tenancy.oc1..aaaaaaaaxckvxcrpggjrgzbzg4rt2c436k5qdo3w3nnqqk6xyhuzikd4rubq'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-try:
-    # Load OCI Configs
-    OCI_CONFIG_FILE_PATH = os.path.expanduser("~/.oci/config")
-    profiles = getProfilesFromConfig(OCI_CONFIG_FILE_PATH)
-    SELECTED_PROFILE = profiles[0]
-
-except Exception as e:
-    print(f"Error: Cannot read config file or empty config file. Details: {e}")
-    sys.exit()
+# SSH key details; the passphrase is read from the environment or prompted for
+SSH_KEY_PATH = os.path.join(BASE_DIR, 'ssh-keys-bah', 'jump')
+SSH_USER = 'opc'
 
-# If multiple profiles are found, prompt the user to select one
-if len(profiles) > 1:
-    print("Please select config name : \n")
+# Path to the script file on your local machine
+SCRIPT_PATH = os.path.join(BASE_DIR, 'irf_script.sh')
 
-    for i, prof in enumerate(profiles):
-        print(f"\t{i+1} : {prof}")
 
+def select_profile(config_file_path):
     try:
-        ind = int(input("\nEnter the profile number : "))
-        SELECTED_PROFILE = profiles[ind - 1]
+        profiles = getProfilesFromConfig(config_file_path)
+        selected_profile = profiles[0]
     except Exception as e:
-
-        print(f"Error: Invalid input. Details: {e}")
+        print(f"Error: Cannot read config file or empty config file. Details: {e}")
         sys.exit()
 
-print(f"Selected Profile: {SELECTED_PROFILE}")
-
-# Load the config file and initialize the BlockstorageClient and IdentityClient
-config = oci.config.from_file(OCI_CONFIG_FILE_PATH, SELECTED_PROFILE)
-blockstorage_client = oci.core.BlockstorageClient(config)
-identity_client = oci.identity.IdentityClient(config)
-compute_client = oci.core.ComputeClient(config)
-
-# SSH key details
-SSH_KEY_PATH = r'C:\Users\irfath\Desktop\CodeGen Knowledge\Python\OCI_test\ssh-keys-bah\jump'
-SSH_KEY_PASSPHRASE = '^~)0Mc(Nx^0.&54o'
-SSH_USER = 'opc'
-
-
-def execute_script_on_instance(instance_ip, script_path):
-    try:
-        key = paramiko.RSAKey(filename=SSH_KEY_PATH, password=SSH_KEY_PASSPHRASE)
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(instance_ip, username=SSH_USER, pkey=key)
-
-        sftp = ssh.open_sftp()
-        sftp.put(script_path, '/tmp/script.sh')
-        sftp.close()
-
-        stdin, stdout, stderr = ssh.exec_command('chmod +x /tmp/script.sh && /tmp/script.sh')
-        print(stdout.read().decode())
-        print(stderr.read().decode())
-        ssh.close()
-    except Exception as e:
-        print(f"Failed to execute script on instance {instance_ip}. Details: {e}")
-
-# List of instance IPs
-instance_ips = [
-    '172.22.180.123'
-    #'your_instance_ip_2',
-    # Add more instance IPs as needed
-]
-
-# Path to the script file on your local machine
-script_path = r'C:\Users\irfath\Desktop\CodeGen Knowledge\Python\OCI_test\irf_script.sh'
-
-# Execute the script on each instance
-for instance_ip in instance_ips:
-    execute_script_on_instance(instance_ip, script_path)
-    print(f'Executed script on instance {instance_ip}')
+    # If multiple profiles are found, prompt the user to select one
+    if len(profiles) > 1:
+        print("Please select config name : \n")
+
+        for i, prof in enumerate(profiles):
+            print(f"\t{i+1} : {prof}")
+
+        try:
+            ind = int(input("\nEnter the profile number : "))
+            selected_profile = profiles[ind - 1]
+        except Exception as e:
+            print(f"Error: Invalid input. Details: {e}")
+            sys.exit()
+
+    print(f"Selected Profile: {selected_profile}")
+    return selected_profile
+
+
+def tag_filter(text):
+    # --tag KEY=VALUE[,VALUE...] -> (key, values); argparse reports the error
+    key, _, value = text.partition('=')
+    if not key.strip() or not value.strip():
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE[,VALUE...], got {text!r}")
+    return key.strip(), value
+
+
+def discover_instance_ips(args):
+    # running instances by tag (tenancy-wide, or within --compartment) or all
+    # of --compartment with their VNIC IPs; the whole selection is cached
+    # between runs
+    config_file_path = os.path.expanduser("~/.oci/config")
+    selected_profile = select_profile(config_file_path)
+    ocisdk = OCISDK(config_file_path, addressCache=AddressCache())
+
+    tag_key, tag_value = args.tag or (None, None)
+    vms, addresses = ocisdk.selectInstances(args.compartment, tag_key, tag_value,
+                                            cfgName=selected_profile,
+                                            refresh=args.refresh)
+
+    instance_ips = []
+    for vm in vms:
+        address = addresses.get(vm["id"], {})
+        ip = address.get("public_ip" if args.public else "private_ip")
+        if ip:
+            instance_ips.append(ip)
+        else:
+            print(f"No {'public' if args.public else 'private'} IP for {vm['name']} ({vm['id']})")
+
+    print(f"Resolved {len(instance_ips)} of {len(vms)} running instance(s)")
+    return instance_ips
+
+
+def read_instance_ips(args):
+    instance_ips = list(args.instance_ips)
+
+    if args.tag or args.compartment:
+        instance_ips.extend(discover_instance_ips(args))
+
+    if args.file:
+        source = sys.stdin if args.file == '-' else open(args.file)
+        with source:
+            instance_ips.extend(line.strip() for line in source
+                                if line.strip() and not line.startswith('#'))
+
+    return instance_ips
+
+
+def execute_script_on_instances(args):
+    instance_ips = read_instance_ips(args)
+    if not instance_ips:
+        print("No instance IPs given.")
+        sys.exit(1)
+
+    passphrase = os.environ.get('SSH_KEY_PASSPHRASE')
+    if passphrase is None:
+        passphrase = getpass.getpass(f"Passphrase for {args.key}: ") or None
+
+    failed = 0
+    with SSHFleet(args.user, keyFile=args.key, passphrase=passphrase,
+                  parallelism=args.parallelism, hostTimeout=args.timeout) as fleet:
+        for result in fleet.runScript(instance_ips, args.script):
+            if result.error is not None or result.exit_code != 0:
+                failed += 1
+                print(f"Failed to execute script on instance {result.host}. "
+                      f"Details: {result.error or f'exit code {result.exit_code}'}")
+            else:
+                print(f'Executed script on instance {result.host} in {result.elapsed:.1f}s')
+
+    print(f"Done: {len(instance_ips) - failed} succeeded, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local script on many instances over SSH")
+    parser.add_argument("instance_ips", nargs="*", help="instance IPs, optionally ip:port")
+    parser.add_argument("--file", help="file with one instance IP per line, '-' for stdin")
+    parser.add_argument("--tag", type=tag_filter, help="run on instances tagged KEY=VALUE[,VALUE...]")
+    parser.add_argument("--compartment", help="compartment OCID to take instances from")
+    parser.add_argument("--public", action="store_true", help="connect to public IPs")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached instance IPs")
+    parser.add_argument("--script", default=SCRIPT_PATH)
+    parser.add_argument("--key", default=SSH_KEY_PATH)
+    parser.add_argument("--user", default=SSH_USER)
+    parser.add_argument("--parallelism", type=int, default=DEFAULT_SSH_PARALLELISM)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per instance")
+
+    execute_script_on_instances(parser.parse_args())
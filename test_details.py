@@ -1,11 +1,16 @@
 import oci
 import sys
 import os
-import csv
 import json  
 from datetime import datetime
+from helpers.capacity import CapacityError, capacityTotals
 from helpers.ocisdk import OCISDK
+from helpers.pagination import iterRecords
+from helpers.reports import openReport
+from helpers.snapshots import (INCREMENTAL_SNAPSHOTS, SnapshotStore, normalizeRow,
+                               takeSnapshot, writeSnapshotReports)
 from helpers.utils import getProfilesFromConfig
+from helpers.volumes import BLOCK_VOLUME_SCHEMA, blockVolumeRow
 
 # Custom JSON encoder for datetime objects
 class DateTimeEncoder(json.JSONEncoder):
@@ -14,9 +19,6 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return json.JSONEncoder.default(self, obj)
 
-# Initialize OCISDK
-ocisdk = OCISDK()
-
 # ==============================================
 # =============== Select Profile ===============
 # ==============================================
@@ -51,54 +53,68 @@ if len(profiles) > 1:
 
 print(f"Selected Profile: {SELECTED_PROFILE}")
 
-# Load the config file and initialize the BlockstorageClient and ComputeClient
-config = oci.config.from_file(OCI_CONFIG_FILE_PATH, SELECTED_PROFILE)
-blockstorage_client = oci.core.BlockstorageClient(config)
-compute_client = oci.core.ComputeClient(config)
+# Initialize OCISDK against the selected config file and take its shared
+# BlockstorageClient for the selected profile
+ocisdk = OCISDK(OCI_CONFIG_FILE_PATH)
+blockstorage_client = ocisdk.clients.get(SELECTED_PROFILE, "blockstorage")
 
 compartment_id = 'ocid1.compartment.oc1..aaaaaaaaqebxly4yqahee72qluopghprzfeqy6mazf5fcl6ghruerlcodjua'
 
-# Function to list all block volumes in a compartment
-def list_block_volumes(compartment_id):
-    try:
-        volumes = []
-        response = blockstorage_client.list_volumes(compartment_id=compartment_id)
-        volumes.extend(response.data)
-        
-        # Handle pagination if necessary
-        while response.has_next_page:
-            response = blockstorage_client.list_volumes(compartment_id=compartment_id, page=response.next_page)
-            volumes.extend(response.data)
-        
-        return volumes
+# Function to write all block volumes in a compartment to a report as the
+# pages arrive; returns the number of volumes and their total size
+def write_block_volumes(compartment_id, report):
+    total_count = 0
+    total_size_gb = 0
+
+    # errors propagate so the report is abandoned and the previous one kept
+    for volume in iterRecords(blockstorage_client.list_volumes, compartment_id=compartment_id):
+        report.write(blockVolumeRow(volume))
+        total_count += 1
+        total_size_gb += volume.size_in_gbs
+
+    return total_count, total_size_gb
 
+# Incremental variant: the stored snapshot of the compartment is compared with
+# the listing and only the delta is written next to the full view
+def snapshot_block_volumes(compartment_id, store):
+    scope = f"{BLOCK_VOLUME_SCHEMA.name}:{compartment_id}"
+    totals = {"count": 0, "size_gb": 0}
+
+    def listing():
+        for volume in iterRecords(blockstorage_client.list_volumes, compartment_id=compartment_id):
+            totals["count"] += 1
+            totals["size_gb"] += volume.size_in_gbs
+            yield volume
+
+    try:
+        # the listing already carries every column, so the row is the fingerprint
+        delta = takeSnapshot(store, scope, listing(),
+                             key=lambda volume: volume.id,
+                             fetchRow=blockVolumeRow,
+                             fingerprint=lambda volume: str(normalizeRow(blockVolumeRow(volume))))
     except oci.exceptions.ServiceError as e:
         print(f"Service error: {e}")
-        return []
-    except Exception as e:
-        print(f"Error: {e}")
-        return []
+        return 0, 0
+
+    print(f"Block volumes: {len(delta.added)} added, {len(delta.changed)} changed, "
+          f"{len(delta.removed)} removed, {delta.unchanged} unchanged, {delta.failed} failed")
+
+    for path in writeSnapshotReports(store, scope, BLOCK_VOLUME_SCHEMA, delta,
+                                     name='block_volume_details2'):
+        print(f"Block Volume Details have been written to {path}")
+
+    return totals["count"], totals["size_gb"]
 
-# Function to list all instances in a compartment and sum their OCPUs and memory
+# Function to sum the OCPUs and memory of all instances in a compartment
+# (shape_config is already part of the list_instances response)
 def get_total_resources(compartment_id):
     try:
-        total_ocpus = 0
-        total_memory_gb = 0
-        response = compute_client.list_instances(compartment_id=compartment_id)
-        instances = response.data
-        
-        # Handle pagination if necessary
-        while response.has_next_page:
-            response = compute_client.list_instances(compartment_id=compartment_id, page=response.next_page)
-            instances.extend(response.data)
-        
-        for instance in instances:
-            shape_details = compute_client.get_instance(instance.id).data.shape_config
-            total_ocpus += shape_details.ocpus
-            total_memory_gb += shape_details.memory_in_gbs  # Assuming `memory_in_gbs` is available
-
-        return total_ocpus, total_memory_gb
+        capacity = ocisdk.getCapacity([compartment_id], cfgName=SELECTED_PROFILE)
+        return capacityTotals(capacity)
 
+    except CapacityError as e:
+        print(f"Warning: totals are incomplete. {e}")
+        return capacityTotals(e.capacity)
     except oci.exceptions.ServiceError as e:
         print(f"Service error: {e}")
         return 0, 0
@@ -106,34 +122,22 @@ def get_total_resources(compartment_id):
         print(f"Error: {e}")
         return 0, 0
 
-# Get all block volumes in the specified compartment
-block_volumes = list_block_volumes(compartment_id)
-
-print(f"Total number of block volumes: {len(block_volumes)}")
-
-# Initialize a variable to hold the sum of sizes
-total_size_gb = 0
-
-
-
-print("Display_Name,volume_OCID,Size (in GB),Lifecycle State")
-for volume in block_volumes:
-#    print(f"Display Name: {volume.display_name}, Volume_OCID: {volume.id}, Size (in GB): {volume.size_in_gbs}, Lifecycle State: {volume.lifecycle_state}")
-    total_size_gb += volume.size_in_gbs
-
-
-# Save the block volume data to a CSV file
-volume_data = [["Display Name", "Volume_OCID", "Size (in GB)", "Lifecycle State"]]
-for volume in block_volumes:
-    volume_data.append([volume.display_name, volume.id, volume.size_in_gbs, volume.lifecycle_state])
-
-csv_file_path = r'Reports\block_volume_details2.csv'
+# Save the block volumes in the specified compartment to Reports/
+if INCREMENTAL_SNAPSHOTS:
+    total_count, total_size_gb = snapshot_block_volumes(compartment_id, SnapshotStore())
+else:
+    total_count = total_size_gb = 0
+    try:
+        with openReport(BLOCK_VOLUME_SCHEMA, name='block_volume_details2') as report:
+            total_count, total_size_gb = write_block_volumes(compartment_id, report)
+        print(f"Block Volume Details have been written to {report.path}")
 
-with open(csv_file_path, mode='w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerows(volume_data)
+    except oci.exceptions.ServiceError as e:
+        print(f"Service error: {e}")
+    except Exception as e:
+        print(f"Error: {e}")
 
-print(f"Block Volume Details have been written to {csv_file_path}")
+print(f"Total number of block volumes: {total_count}")
 
 
 # Get the total number of OCPUs and total memory in the specified compartment